@@ -0,0 +1,99 @@
+import html
+import math
+import numpy as np
+import streamlit as st
+
+ACTIVITY_COLUMNS = ['Time', 'Platform', 'Activity', 'Engagement']
+
+ACTIVITY_TABLE_CSS = """
+<style>
+    .activity-scroll {
+        max-height: 480px;
+        overflow-y: auto;
+    }
+    .activity-table {
+        width: 100%;
+        border-collapse: collapse;
+    }
+    .activity-table th {
+        background-color: #f8f9fa;
+        padding: 12px;
+        text-align: left;
+        font-weight: 600;
+        color: #2d3436;
+        border-bottom: 2px solid #eaeaea;
+        position: sticky;
+        top: 0;
+    }
+    .activity-table td {
+        padding: 12px;
+        border-bottom: 1px solid #eaeaea;
+    }
+    .activity-table tr:hover {
+        background-color: #f8f9fa;
+    }
+    .engagement-high { color: #4CAF50; font-weight: 600; }
+    .engagement-medium { color: #FF9800; font-weight: 600; }
+    .engagement-low { color: #F44336; font-weight: 600; }
+</style>
+"""
+
+def time_ago_labels(timestamps, now):
+    """Relative labels such as '15 min ago' for an array of unix timestamps."""
+    age = np.maximum(now - np.asarray(timestamps, dtype=np.int64), 0)
+    minutes, hours, days = age // 60, age // 3600, age // 86400
+    labels = np.where(
+        age < 60, 'just now',
+        np.where(age < 3600, np.char.add(minutes.astype(str), ' min ago'),
+                 np.where(age < 86400,
+                          np.char.add(hours.astype(str), np.where(hours == 1, ' hour ago', ' hours ago')),
+                          np.char.add(days.astype(str), np.where(days == 1, ' day ago', ' days ago')))))
+    return labels.astype(object)
+
+def _escaped(series):
+    return series.astype(str).map(html.escape)
+
+def activity_rows_html(activity_data):
+    """Build the <tr> rows for a page of activity in one column-wise pass."""
+    if activity_data.empty:
+        return ''
+    engagement = _escaped(activity_data['Engagement'])
+    rows = (
+        '<tr><td>' + _escaped(activity_data['Time'])
+        + '</td><td><strong>' + _escaped(activity_data['Platform'])
+        + '</strong></td><td>' + _escaped(activity_data['Activity'])
+        + "</td><td class='engagement-" + engagement.str.lower() + "'>" + engagement
+        + '</td></tr>'
+    )
+    return ''.join(rows.tolist())
+
+def activity_table_html(activity_data):
+    """Complete, valid HTML table (with styles) for a page of activity."""
+    header = ''.join(f'<th>{column}</th>' for column in ACTIVITY_COLUMNS)
+    return (
+        ACTIVITY_TABLE_CSS
+        + "<div class='analytics-card activity-scroll'><table class='activity-table'>"
+        + f'<thead><tr>{header}</tr></thead><tbody>'
+        + activity_rows_html(activity_data)
+        + '</tbody></table></div>'
+    )
+
+def render_activity_table(activity_data, page_size=25, key='activity', virtual=False):
+    """Render an activity feed as a single element.
+
+    Only the current page is sliced out and turned into HTML, so render time
+    depends on page_size rather than the feed length. With virtual=True the
+    whole feed is handed to st.dataframe, whose grid only draws visible rows.
+    """
+    if virtual:
+        st.dataframe(activity_data[ACTIVITY_COLUMNS], hide_index=True, use_container_width=True)
+        return
+
+    page_count = max(1, math.ceil(len(activity_data) / page_size))
+    page = 1
+    if page_count > 1:
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                               value=1, step=1, key=f'{key}_page')
+    start = (page - 1) * page_size
+    st.markdown(activity_table_html(activity_data.iloc[start:start + page_size]),
+                unsafe_allow_html=True)
@@ -0,0 +1,182 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import database
+from analytics import PLATFORMS
+from database import get_connection
+from storage import MAX_QUERY_PARAMS, open_connection
+
+# Partial aggregate layout: one float64 vector per platform, merged by addition
+PARTIAL_FIELDS = ('periods', 'impressions', 'engagements', 'engaged_users',
+                  'response_weighted', 'response_weight', 'activity_count', 'activity_engagements')
+
+# ========== PARTITIONS ==========
+def plan_partitions(usernames, start, end, platforms=PLATFORMS, parts=1):
+    """Split an aggregation into independent (usernames, platforms, start, end) partitions.
+
+    Many users are split into username groups; a few users are split by
+    platform and then by time slice, so there are at least `parts` pieces
+    whenever the data allows. Every partition is an index range scan.
+    """
+    usernames = list(usernames)
+    platforms = tuple(platforms)
+    groups = max(parts, -(-len(usernames) // MAX_QUERY_PARAMS))
+    if len(usernames) >= groups and groups > 1:
+        size = -(-len(usernames) // groups)
+        return [(tuple(usernames[i:i + size]), platforms, start, end) for i in range(0, len(usernames), size)]
+    if parts <= 1:
+        return [(tuple(usernames), platforms, start, end)]
+    slices = -(-parts // len(platforms))
+    edges = np.linspace(start, end, slices + 1).astype(np.int64)
+    return [(tuple(usernames), (platform,), int(lo), int(hi))
+            for platform in platforms for lo, hi in zip(edges[:-1], edges[1:]) if hi > lo]
+
+def aggregate_partition(conn, partition):
+    """Partial sums per platform for one partition, as {platform: vector}."""
+    usernames, platforms, start, end = partition
+    where = (f"username IN ({', '.join('?' * len(usernames))}) "
+             f"AND platform IN ({', '.join('?' * len(platforms))}) AND ts >= ? AND ts < ?")
+    params = (*usernames, *platforms, start, end)
+    partials = {}
+    for row in conn.execute(f'''
+        SELECT platform, COUNT(*), SUM(impressions), SUM(engagements), SUM(engaged_users),
+               SUM(response_minutes * engagements), SUM(CASE WHEN response_minutes IS NOT NULL THEN engagements END)
+        FROM platform_engagement
+        WHERE {where}
+        GROUP BY platform
+    ''', params):
+        partials.setdefault(row[0], np.zeros(len(PARTIAL_FIELDS)))[:6] = [value or 0 for value in row[1:]]
+    for row in conn.execute(f'''
+        SELECT platform, COUNT(*), SUM(engagements) FROM activity_events
+        WHERE {where}
+        GROUP BY platform
+    ''', params):
+        partials.setdefault(row[0], np.zeros(len(PARTIAL_FIELDS)))[6:] = [value or 0 for value in row[1:]]
+    return partials
+
+_worker_connections = {}
+
+def _run_partition(db_path, partition):
+    """Process-pool entry point: aggregate one partition on this worker's own connection."""
+    conn = _worker_connections.get(db_path)
+    if conn is None:
+        conn = _worker_connections[db_path] = open_connection(db_path)
+    return aggregate_partition(conn, partition)
+
+def merge_partials(partials):
+    """Add per-platform partial vectors from any number of partitions."""
+    merged = {}
+    for partial in partials:
+        for platform, vector in partial.items():
+            if platform in merged:
+                merged[platform] += vector
+            else:
+                merged[platform] = vector.copy()
+    return merged
+
+# ========== RESULTS ==========
+def finalize(merged):
+    """Turn merged sums into columnar per-platform metrics, by engagements descending.
+
+    engagement_rate is engagements per impression (so impression-weighted
+    across periods) and avg_response_minutes is weighted by engagements.
+    """
+    platforms = sorted(merged, key=lambda platform: -merged[platform][2])
+    sums = np.array([merged[platform] for platform in platforms]).reshape(-1, len(PARTIAL_FIELDS))
+    columns = dict(zip(PARTIAL_FIELDS, sums.T))
+    total = columns['engagements'].sum()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(columns['impressions'] > 0, columns['engagements'] / columns['impressions'] * 100, 0.0)
+        response = np.where(columns['response_weight'] > 0,
+                            columns['response_weighted'] / columns['response_weight'], 0.0)
+        share = columns['engagements'] / total * 100 if total else np.zeros(len(platforms))
+    return {
+        'platform': np.array(platforms, dtype=object),
+        'impressions': columns['impressions'].astype(np.int64),
+        'engagements': columns['engagements'].astype(np.int64),
+        'engaged_users': columns['engaged_users'].astype(np.int64),
+        'engagement_rate': rate,
+        'avg_response_minutes': response,
+        'activity_count': columns['activity_count'].astype(np.int64),
+        'activity_engagements': columns['activity_engagements'].astype(np.int64),
+        'share': share,
+    }
+
+def top_n(result, n, by='engagements', other='Other'):
+    """The `n` highest platforms by a column; with `other`, the rest summed into one row.
+
+    Rates in the "Other" row are recomputed from its summed counts.
+    """
+    order = np.argsort(-result[by], kind='stable')
+    top, rest = order[:n], order[n:]
+    ranked = {name: values[top] for name, values in result.items()}
+    if other and len(rest):
+        counts = ('impressions', 'engagements', 'engaged_users', 'activity_count', 'activity_engagements', 'share')
+        ranked['platform'] = np.append(ranked['platform'], other)
+        for name in counts:
+            ranked[name] = np.append(ranked[name], result[name][rest].sum())
+        impressions, engagements = result['impressions'][rest].sum(), result['engagements'][rest].sum()
+        ranked['engagement_rate'] = np.append(ranked['engagement_rate'],
+                                              engagements / impressions * 100 if impressions else 0.0)
+        weights = result['engagements'][rest]
+        ranked['avg_response_minutes'] = np.append(
+            ranked['avg_response_minutes'],
+            np.average(result['avg_response_minutes'][rest], weights=weights) if weights.sum() else 0.0)
+    return ranked
+
+# ========== ENGINE ==========
+class AggregationEngine:
+    """Per-platform engagement aggregation, fanned out over a process pool.
+
+    Each partition is aggregated in a worker on its own SQLite connection
+    (WAL lets readers run side by side) and the partial sums are merged
+    here. With workers=0 the same partitions run inline, which is faster
+    for the few hundred rows behind one user's dashboard.
+    """
+
+    def __init__(self, workers=0):
+        self.workers = workers
+        self._executor = ProcessPoolExecutor(max_workers=workers) if workers else None
+
+    def aggregate(self, usernames, start, end, platforms=PLATFORMS, parts=None):
+        """Per-platform metrics over start <= ts < end for the given users."""
+        if isinstance(usernames, str):
+            usernames = [usernames]
+        if self._executor is None:
+            partitions = plan_partitions(usernames, start, end, platforms, parts or 1)
+            partials = [aggregate_partition(get_connection(), partition) for partition in partitions]
+        else:
+            partitions = plan_partitions(usernames, start, end, platforms, parts or self.workers * 4)
+            partials = self._executor.map(_run_partition, [database.DB_PATH] * len(partitions), partitions)
+        return finalize(merge_partials(partials))
+
+    def shutdown(self, wait=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_aggregation_engine():
+    """The process-wide engine; AGGREGATION_WORKERS sets its pool size (0 runs inline)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = AggregationEngine(int(os.environ.get('AGGREGATION_WORKERS', 0)))
+    return _engine
+
+def configure_aggregation(**kwargs):
+    """Replace the process-wide engine (e.g. to change the worker count)."""
+    global _engine
+    with _engine_lock:
+        old_engine = _engine
+        _engine = AggregationEngine(**kwargs)
+    if old_engine is not None:
+        old_engine.shutdown(wait=False)
+    return _engine
+
+def all_usernames():
+    """Every user with engagement data."""
+    return [row[0] for row in get_connection().execute('SELECT DISTINCT username FROM platform_engagement')]
@@ -0,0 +1,266 @@
+import os
+import random
+import time
+import numpy as np
+from database import get_connection
+
+PLATFORMS = ['Instagram', 'Twitter', 'Facebook', 'LinkedIn', 'TikTok']
+ENGAGEMENT_LEVELS = ['High', 'Medium', 'Low']
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Follower growth goal over the trend chart's window
+FOLLOWER_TARGET_GROWTH = 0.5
+
+# Set DEMO_DATA=1 to give accounts with no analytics a year of synthetic history
+# on first dashboard load (for demos only; it lands in the real tables)
+DEMO_DATA_ENABLED = os.environ.get('DEMO_DATA') == '1'
+
+def create_analytics_tables():
+    """Create the analytics tables, their (user, platform, timestamp) indexes and change tracking."""
+    conn = get_connection()
+    with conn:
+        # Follower count per platform at a point in time
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS follower_snapshots (
+                username TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                followers INTEGER NOT NULL,
+                PRIMARY KEY (username, platform, ts)
+            ) WITHOUT ROWID
+        ''')
+        # Engagement totals per platform for one reporting period
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS platform_engagement (
+                username TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                impressions INTEGER NOT NULL DEFAULT 0,
+                engagements INTEGER NOT NULL DEFAULT 0,
+                engaged_users INTEGER NOT NULL DEFAULT 0,
+                response_minutes REAL,
+                PRIMARY KEY (username, platform, ts)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_platform_engagement_user_ts ON platform_engagement (username, ts)')
+        # Individual activity events (mentions, likes, comments...)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS activity_events (
+                id INTEGER PRIMARY KEY,
+                username TEXT NOT NULL,
+                platform TEXT NOT NULL,
+                ts INTEGER NOT NULL,
+                activity TEXT NOT NULL,
+                engagement_level TEXT NOT NULL,
+                engagements INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_activity_events_user_platform_ts ON activity_events (username, platform, ts)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_activity_events_user_ts ON activity_events (username, ts)')
+        create_change_tracking(conn)
+
+def _columnar(cursor, columns):
+    """Turn a result set into a dict of NumPy arrays, one per (name, dtype) column."""
+    rows = cursor.fetchall()
+    if not rows:
+        return {name: np.array([], dtype=dtype) for name, dtype in columns}
+    return {name: np.array(values, dtype=dtype)
+            for (name, dtype), values in zip(columns, zip(*rows))}
+
+def _platform_filter(platform):
+    return ('AND platform = ?', (platform,)) if platform else ('', ())
+
+# ========== TIME-RANGE QUERIES ==========
+def query_follower_snapshots(username, start, end, platform=None):
+    """Follower snapshots with start <= ts < end as columnar arrays."""
+    clause, params = _platform_filter(platform)
+    cursor = get_connection().execute(f'''
+        SELECT ts, platform, followers FROM follower_snapshots
+        WHERE username = ? {clause} AND ts >= ? AND ts < ?
+        ORDER BY ts
+    ''', (username, *params, start, end))
+    return _columnar(cursor, [('ts', np.int64), ('platform', object), ('followers', np.int64)])
+
+def query_platform_engagement(username, start, end, platform=None):
+    """Per-period engagement rows with start <= ts < end as columnar arrays."""
+    clause, params = _platform_filter(platform)
+    cursor = get_connection().execute(f'''
+        SELECT ts, platform, impressions, engagements, engaged_users, response_minutes
+        FROM platform_engagement
+        WHERE username = ? {clause} AND ts >= ? AND ts < ?
+        ORDER BY ts
+    ''', (username, *params, start, end))
+    return _columnar(cursor, [
+        ('ts', np.int64), ('platform', object), ('impressions', np.int64),
+        ('engagements', np.int64), ('engaged_users', np.int64), ('response_minutes', np.float64),
+    ])
+
+def query_activity_events(username, start, end, platform=None, limit=None):
+    """Activity events with start <= ts < end, newest first, as columnar arrays."""
+    clause, params = _platform_filter(platform)
+    limit_clause = 'LIMIT ?' if limit else ''
+    cursor = get_connection().execute(f'''
+        SELECT ts, platform, activity, engagement_level, engagements FROM activity_events
+        WHERE username = ? {clause} AND ts >= ? AND ts < ?
+        ORDER BY ts DESC
+        {limit_clause}
+    ''', (username, *params, start, end) + ((limit,) if limit else ()))
+    return _columnar(cursor, [
+        ('ts', np.int64), ('platform', object), ('activity', object),
+        ('engagement_level', object), ('engagements', np.int64),
+    ])
+
+def to_frame(columns):
+    """Wrap a columnar result in a pandas DataFrame without copying the arrays."""
+    import pandas as pd
+    return pd.DataFrame(columns, copy=False)
+
+# ========== TARGETS ==========
+def follower_targets(followers, growth=FOLLOWER_TARGET_GROWTH, ts=None):
+    """Straight-line target from the first value to `growth` above it over the series.
+
+    Without `ts` the points are taken as evenly spaced; with it the target
+    grows in proportion to elapsed time.
+    """
+    if len(followers) == 0:
+        return np.array([], dtype=np.int64)
+    first = followers[0]
+    if ts is None or len(ts) < 2 or ts[-1] == ts[0]:
+        progress = np.linspace(0, 1, len(followers))
+    else:
+        progress = (ts - ts[0]) / (ts[-1] - ts[0])
+    return (first * (1 + growth * progress)).round().astype(np.int64)
+
+# ========== CHANGE TRACKING ==========
+# Raw tables tracked for the derived data, and whether each feeds the follower series
+TRACKED_TABLES = {'platform_engagement': False, 'activity_events': False, 'follower_snapshots': True}
+
+def _mark_changed_sql(row, series):
+    """Trigger statement recording that `row` (NEW or OLD) was written."""
+    columns = 'rollups_from, series_from' if series else 'rollups_from'
+    values = f'{row}.ts, {row}.ts' if series else f'{row}.ts'
+    updates = ', '.join(f'{column} = MIN(COALESCE({column}, excluded.{column}), excluded.{column})'
+                        for column in columns.split(', '))
+    return f'''
+        INSERT INTO analytics_changes (username, version, {columns})
+        VALUES ({row}.username, 1, {values})
+        ON CONFLICT (username) DO UPDATE SET version = version + 1, {updates};
+    '''
+
+def create_change_tracking(conn):
+    """Record, per user, the oldest raw timestamp written since the rollups and series were refreshed.
+
+    Triggers on the raw tables keep analytics_changes up to date whatever
+    writes the rows (ingest, backfills, demo data), including rows older than
+    anything already rolled up. `version` goes up on every write, so it also
+    serves as the user's data version. Call inside a transaction.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'analytics_changes'").fetchone()
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_changes (
+            username TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            rollups_from INTEGER,
+            series_from INTEGER
+        )
+    ''')
+    for table, series in TRACKED_TABLES.items():
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_changed_insert AFTER INSERT ON {table}
+            BEGIN {_mark_changed_sql('NEW', series)} END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_changed_update AFTER UPDATE ON {table}
+            BEGIN {_mark_changed_sql('OLD', series)} {_mark_changed_sql('NEW', series)} END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_changed_delete AFTER DELETE ON {table}
+            BEGIN {_mark_changed_sql('OLD', series)} END
+        ''')
+    if not exists:
+        # Rows written before tracking existed: rebuild those users from scratch once
+        conn.execute('''
+            INSERT INTO analytics_changes (username, version, rollups_from, series_from)
+            SELECT username, 1, 0, 0 FROM (
+                SELECT username FROM follower_snapshots
+                UNION SELECT username FROM platform_engagement
+                UNION SELECT username FROM activity_events
+            )
+        ''')
+
+def _pending_since(conn, username, column):
+    """Oldest raw ts written since the last refresh of the rollups or series (`column`), or None."""
+    row = conn.execute(f'SELECT {column} FROM analytics_changes WHERE username = ?', (username,)).fetchone()
+    return row[0] if row else None
+
+# ========== DEMO DATA ==========
+def has_analytics_data(username):
+    """Whether a user has any follower, engagement or activity rows."""
+    conn = get_connection()
+    for table in ('follower_snapshots', 'platform_engagement', 'activity_events'):
+        if conn.execute(f'SELECT 1 FROM {table} WHERE username = ? LIMIT 1', (username,)).fetchone():
+            return True
+    return False
+
+def seed_demo_data(username, days=365, now=None):
+    """Fill a user's analytics with a year of plausible synthetic history."""
+    now = int(now or time.time())
+    rng = random.Random(username)
+    start = (now // DAY - days) * DAY
+    snapshots, engagement, events = [], [], []
+    activities = ['New mention from @TechReview', 'Photo received {n} likes', 'Page liked by {n} new users',
+                  'Connection request accepted', 'Post reached {n} impressions', 'New comment on your post']
+    for platform in PLATFORMS:
+        followers = rng.randint(800, 4000)
+        growth = rng.uniform(0.0005, 0.002)
+        for day in range(days + 1):
+            ts = start + day * DAY
+            followers = int(followers * (1 + growth + rng.uniform(-0.0005, 0.0005)))
+            snapshots.append((username, platform, ts, followers))
+            impressions = int(followers * rng.uniform(0.5, 2.0))
+            engagements = int(impressions * rng.uniform(0.02, 0.08))
+            engagement.append((username, platform, ts, impressions, engagements,
+                               int(engagements * rng.uniform(0.3, 0.7)), rng.uniform(10, 45)))
+    for _ in range(200):
+        ts = now - int(rng.expovariate(1 / (2 * DAY)))
+        level = rng.choice(ENGAGEMENT_LEVELS)
+        events.append((username, rng.choice(PLATFORMS), ts,
+                       rng.choice(activities).format(n=rng.randint(5, 1500)), level, rng.randint(1, 500)))
+
+    conn = get_connection()
+    with conn:
+        conn.executemany('INSERT OR REPLACE INTO follower_snapshots VALUES (?, ?, ?, ?)', snapshots)
+        conn.executemany('INSERT OR REPLACE INTO platform_engagement VALUES (?, ?, ?, ?, ?, ?, ?)', engagement)
+        conn.executemany('''
+            INSERT INTO activity_events (username, platform, ts, activity, engagement_level, engagements)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', events)
+
+def ensure_demo_data(username):
+    """Seed demo analytics for a user with no data at all, if DEMO_DATA is on.
+
+    Returns True if anything was seeded.
+    """
+    if not DEMO_DATA_ENABLED or has_analytics_data(username):
+        return False
+    seed_demo_data(username)
+    return True
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Seed synthetic analytics for demo accounts.")
+    parser.add_argument('usernames', nargs='+')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--force', action='store_true', help="seed even if the user already has data")
+    args = parser.parse_args()
+
+    for username in args.usernames:
+        if has_analytics_data(username) and not args.force:
+            print(f"Skipped {username}: already has analytics data (use --force to add demo rows anyway).")
+            continue
+        seed_demo_data(username, days=args.days)
+        print(f"Seeded {args.days} days of demo analytics for {username}.")
@@ -0,0 +1,50 @@
+"""Micro-benchmark: repeated verify_user latency with and without the credential cache.
+
+Run from the Project directory:
+    python -m benchmarks.credential_cache --rounds 12 --logins 50
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import database
+from credential_cache import configure_credential_cache
+from hashing import configure_hashing
+
+def time_logins(username, password, logins):
+    """Return per-call verify_user latencies in milliseconds."""
+    latencies = []
+    for _ in range(logins):
+        start = time.perf_counter()
+        assert database.verify_user(username, password)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def report(label, latencies):
+    print(f"{label:<12} median {statistics.median(latencies):8.3f} ms   "
+          f"max {max(latencies):8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt work factor")
+    parser.add_argument('--logins', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(os.path.join(tmp, 'bench.db'))
+        database.create_users_table()
+        configure_hashing(rounds=args.rounds)
+        database.register_user('bench', 'bench-password', 'bench@example.com')
+
+        configure_credential_cache(enabled=False)
+        report('uncached', time_logins('bench', 'bench-password', args.logins))
+
+        cache = configure_credential_cache(ttl=300)
+        report('cached', time_logins('bench', 'bench-password', args.logins))
+        print(f"cache stats: {cache.stats()}")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
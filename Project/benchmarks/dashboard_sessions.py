@@ -0,0 +1,63 @@
+"""Benchmark: N concurrent sessions loading one account's dashboard data, with and without the shared result cache.
+
+Run from the Project directory:
+    python -m benchmarks.dashboard_sessions --sessions 32 --accounts 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import database
+import result_cache
+from analytics import seed_demo_data
+from dashboard import load_dashboard_data
+from schema import ensure_schema
+from timing import RenderTimer
+
+def load_concurrently(usernames, sessions):
+    """Start `sessions` threads at once, spread over the accounts; return wall seconds."""
+    barrier = threading.Barrier(sessions)
+
+    def session(n):
+        barrier.wait()
+        load_dashboard_data(usernames[n % len(usernames)], int(time.time()), RenderTimer())
+
+    threads = [threading.Thread(target=session, args=(n,)) for n in range(sessions)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=32)
+    parser.add_argument('--accounts', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(os.path.join(tmp, 'bench.db'))
+        ensure_schema()
+        usernames = [f"user{i}" for i in range(args.accounts)]
+        # Seed history and build rollups up front so both runs measure reads only
+        for username in usernames:
+            seed_demo_data(username)
+        result_cache.RESULT_CACHE_ENABLED = False
+        load_concurrently(usernames, len(usernames))
+
+        seconds = load_concurrently(usernames, args.sessions)
+        print(f"uncached  {args.sessions} sessions over {args.accounts} accounts: {seconds * 1000:8.1f} ms")
+
+        result_cache.RESULT_CACHE_ENABLED = True
+        seconds = load_concurrently(usernames, args.sessions)
+        print(f"cold      {args.sessions} sessions over {args.accounts} accounts: {seconds * 1000:8.1f} ms")
+        seconds = load_concurrently(usernames, args.sessions)
+        print(f"warm      {args.sessions} sessions over {args.accounts} accounts: {seconds * 1000:8.1f} ms")
+        print(f"cache stats: {result_cache.result_cache.stats()}")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Synthetic users and analytics events for the benchmarks, at fixed scales."""
+import bcrypt
+
+import database
+from benchmarks.ingest_throughput import synthetic_events
+from ingest import EventIngestor
+
+# Named dataset sizes accepted by --scale
+SCALES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+BENCH_PASSWORD = 'bench-password'
+
+def parse_scale(value):
+    """A SCALES name or a plain integer count."""
+    return SCALES[value.lower()] if value.lower() in SCALES else int(value)
+
+def iter_user_rows(count, chunk_size=10000, rounds=4):
+    """Yield chunks of (username, password_hash, email) rows.
+
+    Every row shares one precomputed hash, so a million accounts take seconds
+    to generate rather than days of bcrypt.
+    """
+    password_hash = bcrypt.hashpw(BENCH_PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    for start in range(0, count, chunk_size):
+        yield [(f"user{i}", password_hash, f"user{i}@example.com")
+               for i in range(start, min(start + chunk_size, count))]
+
+def load_users(count, chunk_size=10000):
+    """Insert `count` synthetic users through the configured user store."""
+    store = database.get_user_store()
+    store.create_schema()
+    return sum(store.add_users(rows) for rows in iter_user_rows(count, chunk_size))
+
+def iter_event_chunks(count, chunk_size=10000, seed=0, users=100):
+    """Yield synthetic events in chunks so large datasets never sit in memory at once."""
+    for n, start in enumerate(range(0, count, chunk_size)):
+        yield synthetic_events(min(chunk_size, count - start), seed=seed + n, users=users)
+
+def load_events(count, chunk_size=10000, seed=0, users=100):
+    """Write `count` synthetic events through the EventIngestor; returns how many were stored."""
+    ingestor = EventIngestor().start()
+    for chunk in iter_event_chunks(count, chunk_size, seed, users):
+        ingestor.submit(chunk)
+    ingestor.stop()
+    return ingestor.stats['written']
@@ -0,0 +1,74 @@
+"""Benchmark: sustained event ingestion throughput through EventIngestor.
+
+Run from the Project directory:
+    python -m benchmarks.ingest_throughput --events 200000 --producers 4
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+import database
+from analytics import ENGAGEMENT_LEVELS, PLATFORMS
+from ingest import EventIngestor
+
+def synthetic_events(count, seed=0, users=100):
+    """Mixed activity/engagement/follower events spread over the last 30 days."""
+    rng = random.Random(seed)
+    now = int(time.time())
+    events = []
+    for i in range(count):
+        username = f"user{rng.randrange(users)}"
+        platform = rng.choice(PLATFORMS)
+        ts = now - rng.randrange(30 * 86400)
+        roll = rng.random()
+        if roll < 0.8:
+            events.append({'username': username, 'platform': platform, 'ts': ts,
+                           'activity': 'Post received likes', 'engagement_level': rng.choice(ENGAGEMENT_LEVELS),
+                           'engagements': rng.randrange(500)})
+        elif roll < 0.95:
+            events.append({'kind': 'engagement', 'username': username, 'platform': platform, 'ts': ts + i,
+                           'impressions': rng.randrange(10000), 'engagements': rng.randrange(500),
+                           'engaged_users': rng.randrange(300), 'response_minutes': rng.uniform(5, 60)})
+        else:
+            events.append({'kind': 'followers', 'username': username, 'platform': platform, 'ts': ts + i,
+                           'followers': rng.randrange(100, 100000)})
+    return events
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200000)
+    parser.add_argument('--producers', type=int, default=4)
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events)
+    chunks = [events[i:i + args.chunk_size] for i in range(0, len(events), args.chunk_size)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(os.path.join(tmp, 'bench.db'))
+        ingestor = EventIngestor(batch_size=args.batch_size).start()
+
+        def produce(worker):
+            for chunk in chunks[worker::args.producers]:
+                ingestor.submit(chunk)
+
+        start = time.perf_counter()
+        producers = [threading.Thread(target=produce, args=(i,)) for i in range(args.producers)]
+        for thread in producers:
+            thread.start()
+        for thread in producers:
+            thread.join()
+        ingestor.stop()
+        elapsed = time.perf_counter() - start
+
+        stats = ingestor.stats
+        print(f"{stats['written']:,} events written ({stats['rejected']} rejected) in "
+              f"{stats['batches']} batches, {elapsed:.2f}s -> {stats['written'] / elapsed:,.0f} events/s")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Load test: CPU spent on a password-guessing attack with and without the login rate limiter.
+
+Attacker threads send attempts at a fixed rate against one account (and spray random usernames) from a
+handful of client addresses; every attempt that gets past the limiter costs
+a bcrypt verification. Run from the Project directory:
+    python -m benchmarks.login_attack --threads 8 --seconds 5
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import database
+from credential_cache import configure_credential_cache
+from hashing import HashingBusyError, configure_hashing
+from rate_limit import configure_login_limiter
+
+def attack(limiter, seconds, threads, clients, rate):
+    """Run attacker threads sending `rate` attempts/s each; return attempt counters and CPU use."""
+    counts = {'attempts': 0, 'limited': 0, 'verified': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def worker(n):
+        client = f"10.0.0.{n % clients}"
+        local = dict.fromkeys(counts, 0)
+        i = 0
+        next_at = time.perf_counter()
+        while time.perf_counter() < deadline:
+            next_at += 1 / rate
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            # Alternate between the target account and random usernames
+            username = 'victim' if i % 2 == 0 else f"user{n}-{i}"
+            i += 1
+            local['attempts'] += 1
+            if limiter is not None and limiter.check(username, client):
+                local['limited'] += 1
+                continue
+            try:
+                database.verify_user(username, f"guess-{i}")
+                local['verified'] += 1
+            except HashingBusyError:
+                local['busy'] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    counts['cpu_seconds'] = cpu
+    counts['cpu_percent'] = 100 * cpu / wall
+    return counts
+
+def report(label, counts):
+    print(f"{label:<12} attempts {counts['attempts']:>9}  limited {counts['limited']:>9}  "
+          f"checked {counts['verified']:>6}  busy {counts['busy']:>5}  "
+          f"cpu {counts['cpu_seconds']:6.2f}s ({counts['cpu_percent']:5.1f}% of one core)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt work factor")
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--clients', type=int, default=4, help="distinct attacker addresses")
+    parser.add_argument('--rate', type=float, default=200, help="attempts per second per thread")
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(os.path.join(tmp, 'bench.db'))
+        database.create_users_table()
+        configure_hashing(rounds=args.rounds)
+        configure_credential_cache(enabled=False)
+        database.register_user('victim', 'correct-horse', 'victim@example.com')
+
+        report('unlimited', attack(None, args.seconds, args.threads, args.clients, args.rate))
+        limiter = configure_login_limiter()
+        report('limited', attack(limiter, args.seconds, args.threads, args.clients, args.rate))
+        print(f"limiter stats: {limiter.stats()}")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Benchmark: per-platform engagement aggregation over all users, scaling from 1 to N worker processes.
+
+Loads a synthetic multi-million-event dataset once, then times
+AggregationEngine.aggregate() inline and with 1, 2, 4... workers, checking
+every run against the inline result. Run from the Project directory:
+    python -m benchmarks.platform_aggregation --events 2000000 --users 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+import database
+from aggregation import AggregationEngine, all_usernames, top_n
+from analytics import DAY, create_analytics_tables
+from benchmarks.datasets import load_events
+
+def worker_counts(limit):
+    """1, 2, 4... up to and including `limit`."""
+    counts, n = [], 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    return counts + [limit]
+
+def time_engine(engine, usernames, start, end, repeats):
+    result = engine.aggregate(usernames, start, end)  # warm-up: starts workers, fills page cache
+    seconds = []
+    for _ in range(repeats):
+        begin = time.perf_counter()
+        engine.aggregate(usernames, start, end)
+        seconds.append(time.perf_counter() - begin)
+    return statistics.median(seconds), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=2_000_000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database.configure_database(os.path.join(tmp, 'bench.db'))
+        create_analytics_tables()
+        begin = time.perf_counter()
+        load_events(args.events, users=args.users)
+        print(f"Loaded {args.events:,} events for {args.users} users in {time.perf_counter() - begin:.1f}s "
+              f"({os.cpu_count()} CPUs available)")
+
+        usernames = all_usernames()
+        end = int(time.time()) + 1
+        start = end - 30 * DAY
+        inline = AggregationEngine(workers=0)
+        baseline, expected = time_engine(inline, usernames, start, end, args.repeats)
+        print(f"{'inline':<10} {baseline * 1000:9.1f} ms")
+
+        single = None
+        for workers in worker_counts(args.max_workers):
+            engine = AggregationEngine(workers=workers)
+            seconds, result = time_engine(engine, usernames, start, end, args.repeats)
+            engine.shutdown()
+            assert all(np.allclose(result[name], expected[name]) for name in expected if name != 'platform')
+            single = single or seconds
+            print(f"{workers:>3} workers {seconds * 1000:9.1f} ms   speedup x{single / seconds:4.2f} "
+                  f"vs 1 worker, x{baseline / seconds:4.2f} vs inline")
+
+        ranked = top_n(expected, args.top)
+        for platform, engagements, rate, response in zip(ranked['platform'], ranked['engagements'],
+                                                        ranked['engagement_rate'], ranked['avg_response_minutes']):
+            print(f"  {platform:<10} {engagements:>12,} engagements  {rate:5.2f}% rate  {response:5.1f} min response")
+        database.close_connections()
+
+if __name__ == "__main__":
+    main()
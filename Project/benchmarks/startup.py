@@ -0,0 +1,70 @@
+"""Benchmark: cold import time and first paint for the login and dashboard paths.
+
+Every measurement runs in a fresh interpreter so module caches don't hide
+import cost. Run from the Project directory:
+    python -m benchmarks.startup --repeat 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LOGIN_MODULES = ['streamlit', 'database', 'hashing', 'layout', 'schema', 'sessions']
+DASHBOARD_MODULES = LOGIN_MODULES + ['dashboard']
+
+IMPORT_SNIPPET = '''
+import json, sys, time
+start = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - start
+heavy = sorted(name for name in ('pandas', 'numpy', 'plotly') if name in sys.modules)
+print(json.dumps({{'seconds': elapsed, 'heavy_modules': heavy}}))
+'''
+
+FIRST_PAINT_SNIPPET = '''
+import json, time
+from streamlit.testing.v1 import AppTest
+import database, schema, sessions
+schema.ensure_schema()
+at = AppTest.from_file('app.py', default_timeout=120)
+if {dashboard!r}:
+    at.query_params['session'] = sessions.create_session('bench')
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+assert not at.exception, at.exception
+print(json.dumps({{'seconds': elapsed, 'logged_in': at.session_state.logged_in}}))
+'''
+
+def run_snippet(code, env):
+    """Run a snippet in a fresh interpreter and return its JSON result."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def measure(label, code, env, repeat):
+    results = [run_snippet(code, env) for _ in range(repeat)]
+    seconds = [result['seconds'] * 1000 for result in results]
+    extra = {key: value for key, value in results[-1].items() if key != 'seconds'}
+    print(f"{label:<22} median {statistics.median(seconds):8.1f} ms   min {min(seconds):8.1f} ms   {extra}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, USERS_DB_PATH=os.path.join(tmp, 'bench.db'), BCRYPT_ROUNDS='4')
+        measure('import: login', IMPORT_SNIPPET.format(modules=LOGIN_MODULES), env, args.repeat)
+        measure('import: dashboard', IMPORT_SNIPPET.format(modules=DASHBOARD_MODULES), env, args.repeat)
+        measure('first paint: login', FIRST_PAINT_SNIPPET.format(dashboard=False), env, args.repeat)
+        measure('first paint: dashboard', FIRST_PAINT_SNIPPET.format(dashboard=True), env, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Benchmark suite: auth, user listing and dashboard figure hot paths, saved as JSON.
+
+Cases:
+    auth     register_user / verify_user throughput and latency under threads and processes
+    users    get_all_users, a full batched scan and random page reads over --scale users
+    figures  rollup and follower series refresh, chart data queries, figure build and JSON serialization
+             over --scale events
+
+Run from the Project directory:
+    python -m benchmarks.suite --scale 100k --workers 1,4 --modes threads,processes
+    python -m benchmarks.suite --scale 10k --compare benchmarks/results/<earlier run>.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import database
+from analytics import DAY, create_analytics_tables
+from benchmarks.datasets import BENCH_PASSWORD, load_events, load_users, parse_scale
+from charts import build_follower_figure, build_platform_figure, figure_cache, follower_chart_data, get_figure_json, platform_chart_data
+from credential_cache import configure_credential_cache
+from hashing import HashingBusyError, configure_hashing
+from rollups import create_rollup_tables, refresh_rollups
+from timeseries import create_timeseries_tables, sync_follower_series
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# ========== MEASUREMENT ==========
+def summarize(case, latencies, seconds, errors=0, **params):
+    """One result record: throughput plus latency percentiles in milliseconds."""
+    ms = np.asarray(latencies, dtype=float) * 1000
+    return {
+        'case': case,
+        **params,
+        'ops': len(ms),
+        'errors': errors,
+        'seconds': round(seconds, 6),
+        'ops_per_second': round(len(ms) / seconds, 3) if seconds else None,
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+        'max_ms': round(float(ms.max()), 4),
+    }
+
+def time_repeats(case, fn, repeats, **params):
+    """Call fn() `repeats` times on this thread and summarize."""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeats):
+        call_start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(case, latencies, time.perf_counter() - start, **params)
+
+def _timed_calls(fn, items):
+    latencies = []
+    errors = 0
+    for args in items:
+        start = time.perf_counter()
+        try:
+            if fn(*args) is False:
+                errors += 1
+        except HashingBusyError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+# Top-level so process workers can unpickle them
+def _register_batch(items):
+    return _timed_calls(database.register_user, items)
+
+def _verify_batch(items):
+    return _timed_calls(database.verify_user, items)
+
+def _page_batch(items):
+    return _timed_calls(database.get_users_page, items)
+
+def _init_worker(db_path, rounds):
+    database.configure_database(db_path)
+    configure_hashing(rounds=rounds)
+    configure_credential_cache(enabled=False)
+
+def run_concurrent(case, batch_fn, items, workers, mode, init_args, **params):
+    """Split `items` over `workers` threads or processes and summarize every call."""
+    slices = [items[i::workers] for i in range(workers)]
+    if mode == 'processes':
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args)
+        # Start the workers before the clock does
+        list(executor.map(abs, range(workers)))
+    else:
+        executor = ThreadPoolExecutor(workers)
+    with executor:
+        start = time.perf_counter()
+        parts = list(executor.map(batch_fn, slices))
+        seconds = time.perf_counter() - start
+    latencies = [latency for part, _ in parts for latency in part]
+    errors = sum(part_errors for _, part_errors in parts)
+    return summarize(case, latencies, seconds, errors, mode=mode, workers=workers, **params)
+
+# ========== CASES ==========
+def bench_auth(args, tmp):
+    """Registrations then logins for fresh accounts, per concurrency mode and worker count."""
+    db_path = os.path.join(tmp, 'auth.db')
+    _init_worker(db_path, args.rounds)
+    database.create_users_table()
+    results = []
+    for mode in args.modes:
+        for workers in args.workers:
+            prefix = f"{mode}{workers}-"
+            accounts = [(f"{prefix}{i}", BENCH_PASSWORD) for i in range(args.auth_ops)]
+            results.append(run_concurrent(
+                'register_user', _register_batch,
+                [(name, password, f"{name}@example.com") for name, password in accounts],
+                workers, mode, (db_path, args.rounds), rounds=args.rounds))
+            results.append(run_concurrent(
+                'verify_user', _verify_batch, accounts,
+                workers, mode, (db_path, args.rounds), rounds=args.rounds))
+    return results
+
+def bench_users(args, tmp):
+    """Listing reads over a table of `--scale` users."""
+    db_path = os.path.join(tmp, 'users.db')
+    _init_worker(db_path, args.rounds)
+    load_users(args.scale)
+    results = [
+        time_repeats('get_all_users', database.get_all_users, args.repeats, scale=args.scale),
+        time_repeats('iter_user_batches', lambda: sum(1 for _ in database.iter_users()),
+                     args.repeats, scale=args.scale),
+    ]
+    rng = random.Random(0)
+    pages = [(rng.randrange(args.scale), 100) for _ in range(args.page_reads)]
+    for mode in args.modes:
+        for workers in args.workers:
+            results.append(run_concurrent('get_users_page', _page_batch, pages,
+                                          workers, mode, (db_path, args.rounds), scale=args.scale))
+    return results
+
+def bench_figures(args, tmp):
+    """Dashboard chart path for one user over `--scale` synthetic events."""
+    _init_worker(os.path.join(tmp, 'events.db'), args.rounds)
+    create_analytics_tables()
+    create_rollup_tables()
+    create_timeseries_tables()
+    load_events(args.scale, users=args.event_users)
+    username = 'user0'
+    now = int(time.time())
+
+    def chart_data():
+        return (follower_chart_data(username, now - 365 * DAY, now + 1),
+                platform_chart_data(username, now - 30 * DAY, now + 1))
+
+    params = {'scale': args.scale, 'event_users': args.event_users}
+    results = [time_repeats('refresh_rollups_full', lambda: refresh_rollups(username, full=True),
+                            args.repeats, **params),
+               time_repeats('sync_follower_series_full', lambda: sync_follower_series(username, full=True),
+                            args.repeats, **params)]
+    follower_data, platform_data = chart_data()
+    figure_cache.clear()
+    results += [
+        time_repeats('chart_queries', chart_data, args.repeats, **params),
+        time_repeats('build_follower_figure', lambda: build_follower_figure(follower_data),
+                     args.repeats, **params),
+        time_repeats('build_platform_figure', lambda: build_platform_figure(platform_data),
+                     args.repeats, **params),
+        time_repeats('follower_figure_to_json', lambda: build_follower_figure(follower_data).to_json(),
+                     args.repeats, **params),
+        time_repeats('platform_figure_to_json', lambda: build_platform_figure(platform_data).to_json(),
+                     args.repeats, **params),
+        time_repeats('figure_json_cached', lambda: (
+            get_figure_json('follower', follower_data, build_follower_figure),
+            get_figure_json('platform', platform_data, build_platform_figure)), args.repeats, **params),
+    ]
+    return results
+
+CASES = {'auth': bench_auth, 'users': bench_users, 'figures': bench_figures}
+
+# ========== RESULTS ==========
+def run_metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'argv': sys.argv[1:],
+    }
+
+def result_key(result):
+    """Fields that identify a measurement across runs."""
+    return tuple((name, result.get(name)) for name in ('case', 'mode', 'workers', 'scale', 'rounds'))
+
+def compare(results, baseline_path):
+    """Print throughput and p95 changes against an earlier results file."""
+    with open(baseline_path) as f:
+        baseline = {result_key(r): r for r in json.load(f)['results']}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None or not old['ops_per_second'] or not old['p95_ms']:
+            continue
+        throughput = 100 * (result['ops_per_second'] / old['ops_per_second'] - 1)
+        p95 = 100 * (result['p95_ms'] / old['p95_ms'] - 1)
+        print(f"  {label(result):<48} ops/s {throughput:+7.1f}%   p95 {p95:+7.1f}%")
+
+def label(result):
+    extra = f" [{result['mode']} x{result['workers']}]" if 'mode' in result else ''
+    return f"{result['case']}{extra}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', default='auth,users,figures', help="comma-separated subset of %(default)s")
+    parser.add_argument('--scale', type=parse_scale, default='10k',
+                        help="users/events to generate: 10k, 100k, 1m or a number")
+    parser.add_argument('--workers', default='1,4', help="comma-separated worker counts")
+    parser.add_argument('--modes', default='threads,processes', help="threads and/or processes")
+    parser.add_argument('--rounds', type=int, default=12, help="bcrypt work factor")
+    parser.add_argument('--auth-ops', type=int, default=64, help="registrations and logins per run")
+    parser.add_argument('--page-reads', type=int, default=2000)
+    parser.add_argument('--event-users', type=int, default=100, help="users the events are spread over")
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--output', help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="earlier results file to diff against")
+    args = parser.parse_args()
+    args.workers = [int(n) for n in args.workers.split(',')]
+    args.modes = args.modes.split(',')
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.cases.split(','):
+            print(f"Running {name}...", flush=True)
+            for result in CASES[name](args, tmp):
+                print(f"  {label(result):<48} {result['ops_per_second']:>12,.1f} ops/s   "
+                      f"p50 {result['p50_ms']:9.3f}  p95 {result['p95_ms']:9.3f}  "
+                      f"p99 {result['p99_ms']:9.3f} ms  errors {result['errors']}", flush=True)
+                results.append(result)
+        database.close_connections()
+
+    meta = run_metadata(args)
+    output = args.output or os.path.join(RESULTS_DIR, meta['timestamp'].replace(':', '') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"Saved {len(results)} results to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == "__main__":
+    main()
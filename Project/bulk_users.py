@@ -0,0 +1,75 @@
+import csv
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from database import create_users_table, get_user_store, iter_user_batches
+from hashing import get_hashing_service, hash_password
+
+DEFAULT_BATCH_SIZE = 500
+
+def _read_batches(csv_path, batch_size):
+    """Yield lists of (username, password, email) rows from a CSV file."""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = (
+            (row.get('username', '').strip(), row.get('password', ''), (row.get('email') or '').strip())
+            for row in csv.DictReader(f)
+        )
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
+def import_users(csv_path, batch_size=DEFAULT_BATCH_SIZE, workers=None):
+    """Import users from a CSV file with username, password and email columns.
+
+    Rows are streamed in batches. Each batch skips usernames that are already
+    taken before paying for bcrypt, hashes the rest in parallel across
+    processes and inserts them through the user store's batch insert (one
+    executemany transaction per shard for the SQLite stores).
+    Returns a dict with imported, duplicates and invalid counts.
+    """
+    create_users_table()
+    store = get_user_store()
+    rounds = get_hashing_service().rounds
+    workers = workers or os.cpu_count() or 1
+    stats = {'imported': 0, 'duplicates': 0, 'invalid': 0}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for batch in _read_batches(csv_path, batch_size):
+            valid = [row for row in batch if row[0] and row[1]]
+            stats['invalid'] += len(batch) - len(valid)
+
+            # Drop repeats within the batch and names already in the table
+            taken = store.existing_usernames([row[0] for row in valid]) if valid else set()
+            pending = []
+            for row in valid:
+                if row[0] in taken:
+                    stats['duplicates'] += 1
+                else:
+                    taken.add(row[0])
+                    pending.append(row)
+            if not pending:
+                continue
+
+            chunksize = max(1, len(pending) // (workers * 4))
+            hashes = executor.map(hash_password, [row[1] for row in pending],
+                                  itertools.repeat(rounds), chunksize=chunksize)
+            params = [(row[0], hashed, row[2] or None) for row, hashed in zip(pending, hashes)]
+
+            inserted = store.add_users(params)
+            stats['imported'] += inserted
+            stats['duplicates'] += len(params) - inserted  # lost a race with another writer
+
+    return stats
+
+def export_users(csv_path):
+    """Stream all users (without password hashes) to a CSV file, one batch at a time."""
+    count = 0
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'username', 'email', 'created_at'])
+        for page in iter_user_batches():
+            writer.writerows(page)
+            count += len(page)
+    return count
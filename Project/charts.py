@@ -0,0 +1,170 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from aggregation import get_aggregation_engine, top_n
+from analytics import HOUR, follower_targets
+from timeseries import MAX_CHART_POINTS, downsample, follower_history
+
+PLATFORM_COLORS = {
+    'Instagram': '#E1306C',
+    'Twitter': '#1DA1F2',
+    'Facebook': '#1877F2',
+    'LinkedIn': '#0077B5',
+    'TikTok': '#000000',
+    'Other': '#b2bec3'
+}
+
+# ========== CHART DATA ==========
+# Platforms shown by name in the engagement chart; the rest are grouped as "Other"
+PLATFORM_CHART_TOP = 5
+
+def follower_chart_data(username, start, end):
+    """Total followers over [start, end), cut down to what the chart can show."""
+    history = follower_history(username, start, end, step=HOUR)
+    ts, followers = downsample(history['ts'], history['followers'], MAX_CHART_POINTS)
+    return pd.DataFrame({
+        'Date': pd.to_datetime(ts, unit='s'),
+        'Followers': followers.round().astype('int64'),
+        'Target': follower_targets(followers, ts=ts)
+    })
+
+def platform_chart_data(username, start, end):
+    """Top platforms by engagements over [start, end), from the raw engagement data."""
+    ranked = top_n(get_aggregation_engine().aggregate(username, start, end), PLATFORM_CHART_TOP)
+    return pd.DataFrame({
+        'Platform': ranked['platform'],
+        'Engagement': ranked['engagements'],
+        'Engagement Rate': ranked['engagement_rate'].round(2),
+        'Avg Response (min)': ranked['avg_response_minutes'].round(1)
+    })
+
+# ========== FIGURES ==========
+def build_follower_figure(follower_data):
+    """Line chart of actual vs target followers over time."""
+    # Markers only help while the points are few enough to tell apart
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=follower_data['Date'], 
+        y=follower_data['Followers'],
+        mode='lines+markers' if len(follower_data) <= 60 else 'lines',
+        name='Actual Followers',
+        line=dict(color='#667eea', width=3),
+        marker=dict(size=8)
+    ))
+    fig.add_trace(go.Scatter(
+        x=follower_data['Date'], 
+        y=follower_data['Target'],
+        mode='lines',
+        name='Target',
+        line=dict(color='#4CAF50', width=2, dash='dash')
+    ))
+    
+    fig.update_layout(
+        height=350,
+        plot_bgcolor='white',
+        paper_bgcolor='white',
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(l=20, r=20, t=40, b=20)
+    )
+    fig.update_xaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+    fig.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
+    return fig
+
+def build_platform_figure(platform_data):
+    """Donut chart of engagement share per platform."""
+    fig = px.pie(
+        platform_data, 
+        values='Engagement', 
+        names='Platform',
+        color='Platform',
+        color_discrete_map=PLATFORM_COLORS,
+        hover_data=[column for column in ('Engagement Rate', 'Avg Response (min)') if column in platform_data],
+        hole=0.4
+    )
+    
+    fig.update_layout(
+        height=350,
+        showlegend=True,
+        legend=dict(orientation="h", yanchor="bottom", y=-0.1, xanchor="center", x=0.5),
+        margin=dict(l=20, r=20, t=40, b=40)
+    )
+    fig.update_traces(textposition='inside', textinfo='percent+label')
+    return fig
+
+def frame_version(df):
+    """Content hash of a DataFrame, usable as a data version for caching."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.blake2b(row_hashes.tobytes(), digest_size=16).hexdigest()
+
+class FigureCache:
+    """LRU cache of built figures and their JSON, keyed by (chart, data version).
+
+    Figures are shared between sessions and must be treated as read-only.
+    The JSON form is produced lazily, once per entry, for consumers that need
+    the serialized spec (exports, embedding).
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, name, version, build, *args):
+        key = (name, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        # Build outside the lock; a concurrent miss just builds twice
+        entry = {'figure': build(*args), 'json': None}
+        with self._lock:
+            entry = self._entries.setdefault(key, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def get_figure(self, name, version, build, *args):
+        """Return the figure for this data version, building it with build(*args) on a miss."""
+        return self._entry(name, version, build, *args)['figure']
+
+    def get_json(self, name, version, build, *args):
+        """Return the serialized figure for this data version, serializing at most once."""
+        entry = self._entry(name, version, build, *args)
+        if entry['json'] is None:
+            entry['json'] = entry['figure'].to_json()
+        return entry['json']
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+# Set FIGURE_CACHE=0 to rebuild every figure on every rerun (for comparison)
+FIGURE_CACHE_ENABLED = os.environ.get('FIGURE_CACHE', '1') != '0'
+figure_cache = FigureCache()
+
+def get_figure(name, data, build):
+    """Get the figure for `data`, reusing the cached one when the data hasn't changed."""
+    if not FIGURE_CACHE_ENABLED:
+        return build(data)
+    return figure_cache.get_figure(name, frame_version(data), build, data)
+
+def get_figure_json(name, data, build):
+    """Get the serialized figure for `data`, reusing the cached JSON when possible."""
+    if not FIGURE_CACHE_ENABLED:
+        return build(data).to_json()
+    return figure_cache.get_json(name, frame_version(data), build, data)
@@ -0,0 +1,85 @@
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+class CredentialCache:
+    """TTL- and LRU-bounded cache of recently verified credentials.
+
+    Entries hold an HMAC of the username and password under a per-process
+    random key, never the password itself, together with the stored bcrypt
+    hash they were checked against. A hit requires the same digest and the
+    same stored hash, so a password change anywhere invalidates the entry
+    even if invalidate() is not called.
+    """
+
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._key = secrets.token_bytes(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, username, password):
+        message = username.encode('utf-8') + b'\0' + password.encode('utf-8')
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def check(self, username, password, stored_hash):
+        """Return True if these credentials were verified recently against stored_hash."""
+        digest = self._digest(username, password)
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None:
+                entry_digest, entry_hash, expires_at = entry
+                if expires_at < time.monotonic() or entry_hash != stored_hash:
+                    del self._entries[username]
+                elif hmac.compare_digest(entry_digest, digest):
+                    self._entries.move_to_end(username)
+                    self.hits += 1
+                    return True
+            self.misses += 1
+            return False
+
+    def add(self, username, password, stored_hash):
+        """Remember credentials that just passed a full bcrypt check."""
+        digest = self._digest(username, password)
+        with self._lock:
+            self._entries[username] = (digest, stored_hash, time.monotonic() + self.ttl)
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, username):
+        """Forget any cached credentials for a user."""
+        with self._lock:
+            self._entries.pop(username, None)
+
+    def clear(self):
+        """Forget all cached credentials."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+# Disabled unless CREDENTIAL_CACHE_TTL is set or configure_credential_cache() is called
+_cache = None
+if os.environ.get('CREDENTIAL_CACHE_TTL'):
+    _cache = CredentialCache(ttl=float(os.environ['CREDENTIAL_CACHE_TTL']))
+
+def get_credential_cache():
+    """Get the process-wide credential cache, or None if caching is off."""
+    return _cache
+
+def configure_credential_cache(ttl=300, max_entries=1024, enabled=True):
+    """Turn the process-wide credential cache on (with new limits) or off."""
+    global _cache
+    _cache = CredentialCache(ttl=ttl, max_entries=max_entries) if enabled else None
+    return _cache
@@ -0,0 +1,366 @@
+import os
+import time
+import pandas as pd
+import streamlit as st
+from activity_table import render_activity_table, time_ago_labels
+from analytics import DAY, HOUR, ensure_demo_data, query_activity_events
+from charts import build_follower_figure, build_platform_figure, follower_chart_data, get_figure, platform_chart_data
+from exports import CHART_FORMATS, DATA_FORMATS, ExportWorkers, chart_exports_available, enqueue_export, has_pending_jobs, list_jobs
+from layout import show_header
+from metrics import observe, prometheus_text, snapshot
+from result_cache import cached_result
+from rollups import get_dashboard_metrics, get_watermark, refresh_rollups
+from sessions import delete_session
+from timeseries import sync_follower_series
+from timing import RenderTimer
+
+# ========== DASHBOARD HELPERS ==========
+def format_count(value):
+    """Compact count for metric cards, e.g. 12.5K."""
+    if value >= 1_000_000:
+        return f"{value / 1_000_000:.1f}M"
+    if value >= 10_000:
+        return f"{value / 1_000:.1f}K"
+    return f"{value:,}"
+
+def percent_change(current, previous):
+    return (current - previous) / previous * 100 if previous else 0.0
+
+def change_text(change, suffix, higher_is_better=True):
+    """Arrow, colour and text for a card's change line."""
+    arrow = "▲" if change >= 0 else "▼"
+    good = (change >= 0) == higher_is_better
+    return f"{arrow} {abs(change):.1f}% {suffix}", "#4CAF50" if good else "#F44336"
+
+def metric_card(icon, value, label, change, color, border_color=None):
+    text, change_color = change
+    border_style = f" style='border-left-color: {border_color};'" if border_color else ""
+    st.markdown(f"""
+    <div class='metric-card'{border_style}>
+        <div style='font-size: 24px; color: {color};'>{icon}</div>
+        <div style='font-size: 28px; font-weight: 700; color: #2d3436;'>{value}</div>
+        <div style='color: #636e72; font-size: 14px;'>{label}</div>
+        <div style='color: {change_color}; font-size: 12px; margin-top: 5px;'>{text}</div>
+    </div>
+    """, unsafe_allow_html=True)
+
+def metrics_panel():
+    """Latency histograms and counters for admins, in the sidebar."""
+    rows = snapshot()
+    if not rows:
+        st.caption("No metrics recorded yet.")
+        return
+    table = pd.DataFrame({
+        'Metric': [row['metric'] + ''.join(f" {key}={value}" for key, value in row['labels'].items())
+                   for row in rows],
+        'Count': [row['count'] for row in rows],
+        'p50 ms': [row['p50'] * 1000 if 'p50' in row else None for row in rows],
+        'p95 ms': [row['p95'] * 1000 if 'p95' in row else None for row in rows],
+        'p99 ms': [row['p99'] * 1000 if 'p99' in row else None for row in rows],
+    })
+    st.dataframe(table, hide_index=True, use_container_width=True,
+                 column_config={name: st.column_config.NumberColumn(format="%.2f")
+                                for name in ('p50 ms', 'p95 ms', 'p99 ms')})
+    st.download_button("Download metrics", prometheus_text(), file_name='metrics.prom',
+                       mime='text/plain', use_container_width=True)
+
+# ========== EXPORTS ==========
+# Export worker processes started with the server; 0 if `python exports.py work` runs them instead
+EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 1))
+EXPORT_POLL_SECONDS = 2
+
+EXPORT_CHOICES = {
+    "Activity table": ('activity', DATA_FORMATS),
+    "Engagement data": ('engagement', DATA_FORMATS),
+    "Follower history": ('followers', DATA_FORMATS),
+    "Follower Growth chart": ('follower_chart', CHART_FORMATS),
+    "Engagement by Platform chart": ('platform_chart', CHART_FORMATS),
+}
+if not chart_exports_available():
+    EXPORT_CHOICES = {label: choice for label, choice in EXPORT_CHOICES.items() if choice[1] is DATA_FORMATS}
+
+@st.cache_resource
+def init_export_workers():
+    """Start the export worker processes once per server process."""
+    if EXPORT_WORKERS:
+        return ExportWorkers(EXPORT_WORKERS).start()
+
+def export_label(job):
+    return f"{job['kind'].replace('_', ' ').capitalize()} ({job['format'].upper()})"
+
+def export_jobs_list(username):
+    """Status of a user's recent exports; polls while any recent ones are still queued or running.
+
+    Only reads the job rows, never the files, so polling stays cheap.
+    """
+    for job in list_jobs(username, 5):
+        if job['status'] == 'done':
+            st.caption(f"✅ {export_label(job)}: {job['rows']:,} rows")
+        elif job['status'] == 'failed':
+            st.caption(f"❌ {export_label(job)}: {job['error']}")
+        else:
+            st.caption(f"⏳ {export_label(job)}: {job['status']}")
+    # Once everything has finished, rerun the page so this stops polling and the download list updates
+    if st.session_state.get('export_polling') and not has_pending_jobs(username):
+        st.session_state.export_polling = False
+        st.rerun()
+
+def export_download(username):
+    """A download button for the one finished export the user picks.
+
+    st.download_button holds the whole file in server memory, so only the
+    selected file is read, and never from the polling fragment.
+    """
+    finished = {job['id']: job for job in list_jobs(username, 5)
+                if job['status'] == 'done' and os.path.exists(job['path'])}
+    if not finished:
+        return
+    job_id = st.selectbox("Download", list(finished), index=None, placeholder="Choose a finished export",
+                          format_func=lambda job_id: export_label(finished[job_id]), key='export_download')
+    if job_id is not None:
+        path = finished[job_id]['path']
+        with open(path, 'rb') as f:
+            st.download_button(f"⬇️ {os.path.basename(path)}", f, file_name=os.path.basename(path),
+                               use_container_width=True)
+
+def export_panel(username):
+    """Queue an export; the file is produced off the request path by the export workers."""
+    choice = st.selectbox("Export", list(EXPORT_CHOICES), key='export_choice')
+    kind, formats = EXPORT_CHOICES[choice]
+    fmt = st.selectbox("Format", formats, format_func=str.upper, key='export_format')
+    days = st.select_slider("Period (days)", options=[7, 30, 90, 365], value=30, key='export_days')
+    if st.button("Queue Export", use_container_width=True):
+        enqueue_export(username, kind, fmt, days)
+    st.session_state.export_polling = has_pending_jobs(username)
+    jobs_list = st.fragment(export_jobs_list,
+                            run_every=EXPORT_POLL_SECONDS if st.session_state.export_polling else None)
+    jobs_list(username)
+    export_download(username)
+
+# ========== DASHBOARD DATA ==========
+# Usernames that see the metrics panel, comma-separated
+ADMIN_USERS = set(filter(None, os.environ.get('ADMIN_USERS', '').split(',')))
+
+# Live mode polls for new data every LIVE_REFRESH_SECONDS by default
+LIVE_REFRESH_SECONDS = int(os.environ.get('LIVE_REFRESH_SECONDS', 15))
+LIVE_INTERVALS = sorted({5, 15, 30, 60, LIVE_REFRESH_SECONDS})
+
+def load_dashboard_data(username, now, timer):
+    """Everything the dashboard shows for one user, through the shared result cache.
+
+    Results are keyed by (user, metric, window, data version). The version is
+    the user's rollup watermark, which moves on with every raw write, and
+    every window ends on the next hour boundary, so all sessions for an
+    account share one query per metric until new data arrives or the hour
+    turns. Returns None if the user has no analytics data yet.
+    """
+    with timer.section('refresh check'):
+        ensure_demo_data(username)
+        refresh_rollups(username)
+        sync_follower_series(username)
+        version = get_watermark(username)
+    if version is None:
+        # No raw data at all yet
+        return None
+    until = now - now % HOUR + HOUR
+    
+    with timer.section('metrics query'):
+        metrics = cached_result(username, 'metrics', until, version,
+                                lambda: get_dashboard_metrics(username, until - 1))
+    
+    # Total followers over the last year
+    with timer.section('follower query'):
+        year = (until - 365 * DAY, until)
+        follower_data = cached_result(username, 'follower_history', year, version,
+                                      lambda: follower_chart_data(username, *year))
+    
+    # Engagements per platform over the last 30 days
+    with timer.section('platform query'):
+        month = (until - 30 * DAY, until)
+        platform_data = cached_result(username, 'platform_engagement', month, version,
+                                      lambda: platform_chart_data(username, *month))
+    
+    with timer.section('activity query'):
+        events = cached_result(username, 'activity', month, version,
+                               lambda: query_activity_events(username, *month, limit=500))
+    
+    return {
+        'metrics': metrics,
+        'follower_data': follower_data,
+        'platform_data': platform_data,
+        'events': events,
+    }
+
+# ========== DASHBOARD PAGE ==========
+def quick_stats(data):
+    """Sidebar summary of the last day and week."""
+    if data is None:
+        st.caption("No data yet.")
+        return
+    metrics = data['metrics']
+    day, previous_day = metrics['day'], metrics['previous_day']
+    week, previous_week = metrics['week'], metrics['previous_week']
+    st.metric("Active Users", f"{day['engaged_users']:,}",
+              f"{percent_change(day['engaged_users'], previous_day['engaged_users']):+.0f}%")
+    st.metric("Engagement Rate", f"{week['engagement_rate']:.1f}%",
+              f"{week['engagement_rate'] - previous_week['engagement_rate']:+.1f}%")
+    st.metric("Response Time", f"{day['response_minutes']:.0f}m",
+              f"{day['response_minutes'] - previous_day['response_minutes']:+.0f}m", delta_color="inverse")
+
+def dashboard_body(username, quick_stats_slot):
+    """Metric cards, charts and activity; runs as a fragment so it can refresh on its own.
+
+    Also redraws the sidebar Quick Stats into `quick_stats_slot`, so every
+    run loads the dashboard data exactly once.
+    """
+    timer = RenderTimer()
+    now = int(time.time())
+    
+    # Clicking reruns just this fragment, which picks up any new data
+    st.button("🔄 Refresh Data")
+    
+    data = load_dashboard_data(username, now, timer)
+    with quick_stats_slot.container():
+        quick_stats(data)
+    if data is None:
+        st.info("No analytics data yet. Charts and metrics appear here once your "
+                "accounts' follower, engagement or activity data has been ingested.")
+        return
+    metrics = data['metrics']
+    day, previous_day = metrics['day'], metrics['previous_day']
+    week, previous_week = metrics['week'], metrics['previous_week']
+    
+    # Row 1: Key Metrics
+    st.markdown("<div class='section-title'>Performance Overview</div>", unsafe_allow_html=True)
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        metric_card("📱", format_count(metrics['followers']), "Total Followers",
+                    change_text(percent_change(metrics['followers'], metrics['followers_last_month']), "from last month"),
+                    "#667eea")
+    
+    with col2:
+        metric_card("👥", format_count(week['engaged_users']), "Engaged Users",
+                    change_text(percent_change(week['engaged_users'], previous_week['engaged_users']), "from last week"),
+                    "#4CAF50", "#4CAF50")
+    
+    with col3:
+        metric_card("📈", f"{day['engagement_rate']:.1f}%", "Engagement Rate",
+                    change_text(day['engagement_rate'] - previous_day['engagement_rate'], "from yesterday"),
+                    "#FF9800", "#FF9800")
+    
+    with col4:
+        response_change = percent_change(week['response_minutes'], previous_week['response_minutes'])
+        metric_card("⏱️", f"{week['response_minutes']:.0f}m", "Avg. Response Time",
+                    change_text(response_change, "faster" if response_change < 0 else "slower", higher_is_better=False),
+                    "#F44336", "#F44336")
+    
+    # Row 2: Charts
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.markdown("<div class='analytics-card'>", unsafe_allow_html=True)
+        st.markdown("<div class='section-title'>📱 Follower Growth Trend</div>", unsafe_allow_html=True)
+        
+        with timer.section('follower chart'):
+            fig1 = get_figure('follower_growth', data['follower_data'], build_follower_figure)
+        
+        st.plotly_chart(fig1, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with col2:
+        st.markdown("<div class='analytics-card'>", unsafe_allow_html=True)
+        st.markdown("<div class='section-title'>👥 Engagement by Platform</div>", unsafe_allow_html=True)
+        
+        with timer.section('platform chart'):
+            fig2 = get_figure('platform_engagement', data['platform_data'], build_platform_figure)
+        
+        st.plotly_chart(fig2, use_container_width=True)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    # Row 3: Recent Activity
+    st.markdown("<div class='section-title'>📋 Recent Social Activity</div>", unsafe_allow_html=True)
+    events = data['events']
+    activity_data = pd.DataFrame({
+        'Time': time_ago_labels(events['ts'], now),
+        'Platform': events['platform'],
+        'Activity': events['activity'],
+        'Engagement': events['engagement_level']
+    })
+    
+    # Whole table is rendered as one element, one page at a time
+    with timer.section('activity table'):
+        render_activity_table(activity_data)
+    
+    # Per-rerun render timings (enable with DASHBOARD_TIMINGS=1 or ?timings=1)
+    if os.environ.get('DASHBOARD_TIMINGS') == '1' or 'timings' in st.query_params:
+        st.caption(f"Render time: {timer.summary()}")
+    observe('dashboard_render_seconds', timer.total())
+
+def main_dashboard():
+    """Main analytics dashboard with modern design."""
+    show_header()
+    
+    username = st.session_state.username
+    init_export_workers()
+    
+    # User navigation bar
+    st.markdown(f"""
+    <div class='user-nav'>
+        <div style='display: flex; justify-content: space-between; align-items: center;'>
+            <div>
+                <span style='font-weight: 600; color: #2d3436;'>Welcome, {st.session_state.username}!</span>
+                <span style='color: #636e72; font-size: 14px; margin-left: 15px;'>
+                    Last login: {st.session_state.user_data.get('login_time', 'Today')}
+                </span>
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Logout button
+    with st.sidebar:
+        st.markdown("### Account Settings")
+        if st.button("🚪 Sign Out", use_container_width=True):
+            delete_session(st.query_params.get('session'))
+            st.query_params.clear()
+            st.session_state.logged_in = False
+            st.session_state.username = None
+            st.rerun()
+        
+        live_mode = st.toggle("Live updates", key='live_mode')
+        live_interval = st.select_slider("Update every (seconds)", options=LIVE_INTERVALS,
+                                         value=LIVE_REFRESH_SECONDS, key='live_interval', disabled=not live_mode)
+        
+        st.markdown("---")
+        st.markdown("### Quick Stats")
+        # Filled in by the dashboard fragment, so it refreshes along with it
+        quick_stats_slot = st.empty()
+        
+        st.markdown("---")
+        st.markdown("### Exports")
+        export_panel(username)
+        
+        if username in ADMIN_USERS:
+            with st.expander("Performance Metrics"):
+                metrics_panel()
+    
+    # ========== DASHBOARD CONTENT ==========
+    st.markdown("<div class='page-title'>📊 Social Media Analytics Dashboard</div>", unsafe_allow_html=True)
+    
+    # In live mode only this fragment reruns on the timer; it re-queries only
+    # when the user's data version has moved on
+    live_body = st.fragment(dashboard_body, run_every=live_interval if live_mode else None)
+    live_body(username, quick_stats_slot)
+    
+    # Footer
+    st.markdown("""
+    <div style='text-align: center; color: #636e72; margin-top: 40px; padding: 20px; font-size: 14px; border-top: 1px solid #eaeaea;'>
+        <p>Social Analytics Dashboard v2.0 • Data updates every 15 minutes</p>
+        <p style='font-size: 12px; margin-top: 5px;'>
+            Need help? <a href='#' style='color: #667eea; text-decoration: none;'>Contact Support</a> • 
+            <a href='#' style='color: #667eea; text-decoration: none;'>Privacy Policy</a> • 
+            <a href='#' style='color: #667eea; text-decoration: none;'>Terms of Service</a>
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
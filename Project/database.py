@@ -1,72 +1,185 @@
-import sqlite3
-import bcrypt
+import os
+import threading
+from credential_cache import get_credential_cache
+from hashing import get_hashing_service
+from metrics import register_gauge, timed
+from storage import ConnectionPool, MemoryUserStore, ShardedSQLiteUserStore, SQLiteUserStore, open_connection, shard_paths
 
-def create_connection():
-    """Create a database connection to the SQLite database."""
-    conn = sqlite3.connect('users.db', check_same_thread=False)
-    return conn
+# Path to the SQLite database; override with USERS_DB_PATH or configure_database()
+DB_PATH = os.environ.get('USERS_DB_PATH', 'users.db')
+
+# Where user accounts are kept: 'sqlite' (in DB_PATH), 'memory', or 'sharded'
+# (USER_STORE_SHARDS files next to DB_PATH). Analytics always stay in DB_PATH.
+USER_STORE = os.environ.get('USER_STORE', 'sqlite')
+USER_STORE_SHARDS = int(os.environ.get('USER_STORE_SHARDS', 4))
+
+def create_connection(path=None):
+    """Create a new tuned connection to the SQLite database."""
+    return open_connection(path or DB_PATH)
+
+def create_user_store(kind, path, pool=None, shards=USER_STORE_SHARDS):
+    """Build a user store of the given kind for a database path."""
+    if kind == 'sqlite':
+        return SQLiteUserStore(path, pool=pool)
+    if kind == 'memory':
+        return MemoryUserStore()
+    if kind == 'sharded':
+        return ShardedSQLiteUserStore(shard_paths(path, shards))
+    raise ValueError(f"Unknown user store {kind!r}")
+
+_pool = ConnectionPool(DB_PATH)
+_user_store = create_user_store(USER_STORE, DB_PATH, pool=_pool)
+_pool_lock = threading.Lock()
+register_gauge('db_connections', lambda: _pool.size())
+
+def configure_database(path, user_store=None):
+    """Point the connection pool and user store at another database (e.g. for benchmarks).
+
+    `user_store` is a store kind or UserStore instance; by default the
+    current kind is kept and rebuilt for the new path.
+    """
+    global DB_PATH, USER_STORE, _pool, _user_store
+    with _pool_lock:
+        old_pool, old_store = _pool, _user_store
+        DB_PATH = path
+        _pool = ConnectionPool(path)
+        if user_store is None or isinstance(user_store, str):
+            USER_STORE = user_store or USER_STORE
+            _user_store = create_user_store(USER_STORE, path, pool=_pool)
+        else:
+            _user_store = user_store
+    old_store.close()
+    old_pool.close_all()
+
+def get_connection():
+    """Get the pooled connection for the current thread."""
+    return _pool.get()
+
+def get_user_store():
+    """The configured store behind register_user, verify_user and the user listings."""
+    return _user_store
+
+def close_connections():
+    """Close all pooled connections (e.g. on shutdown)."""
+    _user_store.close()
+    _pool.close_all()
 
 def create_users_table():
     """Create the users table if it doesn't exist."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            email TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
-    conn.commit()
-    conn.close()
+    get_user_store().create_schema()
 
+@timed('db_call_seconds')
 def register_user(username, password, email):
     """Register a new user with hashed password."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    
-    # Hash the password
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    
-    try:
-        cursor.execute('''
-            INSERT INTO users (username, password, email)
-            VALUES (?, ?, ?)
-        ''', (username, hashed_password, email))
-        conn.commit()
-        conn.close()
-        return True
-    except sqlite3.IntegrityError:
-        conn.close()
-        return False  # Username already exists
+    # Hash the password on the worker pool
+    hashed_password = get_hashing_service().hash(password)
+    return get_user_store().add_user(username, hashed_password, email)
 
+@timed('db_call_seconds')
 def verify_user(username, password):
     """Verify user credentials."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT password FROM users WHERE username = ?', (username,))
-    row = cursor.fetchone()
-    conn.close()
+    stored_hash = get_user_store().get_password_hash(username)
     
-    if row:
-        hashed_password = row[0]
-        if isinstance(hashed_password, str):
-            hashed_password = hashed_password.encode('utf-8')
-        if bcrypt.checkpw(password.encode('utf-8'), hashed_password):
+    if stored_hash:
+        cache = get_credential_cache()
+        if cache is not None and cache.check(username, password, stored_hash):
+            return True
+        if get_hashing_service().verify(password, stored_hash):
+            if cache is not None:
+                cache.add(username, password, stored_hash)
             return True
     return False
 
+@timed('db_call_seconds')
+def change_password(username, new_password):
+    """Replace a user's password and sign them out everywhere.
+
+    Returns False if the user doesn't exist.
+    """
+    # sessions imports this module
+    from sessions import delete_user_sessions
+
+    hashed_password = get_hashing_service().hash(new_password)
+    changed = get_user_store().set_password_hash(username, hashed_password)
+    cache = get_credential_cache()
+    if cache is not None:
+        cache.invalidate(username)
+    if changed:
+        delete_user_sessions(username)
+    return changed
+
+@timed('db_call_seconds')
 def get_all_users():
-    """Get all users (for admin purposes, optional)."""
-    conn = create_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT id, username, email, created_at FROM users')
-    rows = cursor.fetchall()
-    conn.close()
-    return rows
+    """Get all users (for admin purposes, optional).
+
+    Loads the whole table; prefer iter_user_batches() for large tables.
+    """
+    return get_user_store().get_all_users()
+
+@timed('db_call_seconds')
+def get_users_page(after_id=0, limit=100):
+    """Get up to `limit` users with id greater than `after_id`, ordered by id.
+
+    Pass the last id of a page as `after_id` to fetch the next one; each page
+    is a single primary-key range scan no matter how deep it is.
+    """
+    return get_user_store().get_users_page(after_id, limit)
+
+def iter_user_batches(batch_size=1000):
+    """Yield all users as lists of at most `batch_size` rows, in id order."""
+    after_id = 0
+    while True:
+        page = get_users_page(after_id, batch_size)
+        if not page:
+            return
+        yield page
+        if len(page) < batch_size:
+            return
+        after_id = page[-1][0]
+
+def iter_users(batch_size=1000):
+    """Yield users one row at a time while holding at most one batch in memory."""
+    for page in iter_user_batches(batch_size):
+        yield from page
+
+def get_users_dataframe(batch_size=10000):
+    """Build a pandas DataFrame of all users one batch at a time."""
+    import pandas as pd
+
+    columns = ['id', 'username', 'email', 'created_at']
+    frames = [pd.DataFrame.from_records(page, columns=columns)
+              for page in iter_user_batches(batch_size)]
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
 
 if __name__ == "__main__":
-    create_users_table()
-    print("Database and table created successfully.")
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the users database.")
+    parser.add_argument('--db', help="database file (default: %(default)s)", default=DB_PATH)
+    subparsers = parser.add_subparsers(dest='command')
+    import_parser = subparsers.add_parser('import', help="bulk import users from a CSV file")
+    import_parser.add_argument('csv_path')
+    import_parser.add_argument('--batch-size', type=int, default=500)
+    import_parser.add_argument('--workers', type=int, default=None)
+    export_parser = subparsers.add_parser('export', help="export users to a CSV file")
+    export_parser.add_argument('csv_path')
+    args = parser.parse_args()
+
+    # Run against the module the helpers import, not this __main__ copy
+    import database
+    database.configure_database(args.db)
+
+    if args.command == 'import':
+        from bulk_users import import_users
+        stats = import_users(args.csv_path, batch_size=args.batch_size, workers=args.workers)
+        print(f"Imported {stats['imported']} users, rejected {stats['duplicates']} duplicate "
+              f"usernames and {stats['invalid']} invalid rows.")
+    elif args.command == 'export':
+        from bulk_users import export_users
+        print(f"Exported {export_users(args.csv_path)} users to {args.csv_path}.")
+    else:
+        database.create_users_table()
+        print("Database and table created successfully.")
+
@@ -0,0 +1,395 @@
+import importlib.util
+import json
+import multiprocessing
+import os
+import threading
+import time
+import database
+from database import get_connection
+
+# Where finished exports are written; override with EXPORT_DIR
+EXPORT_DIR = os.environ.get('EXPORT_DIR', 'exports')
+
+# Rows fetched and written per chunk, so memory stays flat however large the export
+EXPORT_CHUNK_ROWS = 50_000
+
+# A worker is killed and restarted, and its job failed, once a job runs longer than this;
+# chart jobs get the shorter render limit, since a stuck headless browser never returns
+JOB_TIMEOUT_SECONDS = int(os.environ.get('EXPORT_JOB_TIMEOUT', 600))
+RENDER_TIMEOUT_SECONDS = int(os.environ.get('EXPORT_RENDER_TIMEOUT', 120))
+
+# Jobs 'running' for longer than any watchdog allows lost their whole pool and are
+# requeued; workers check every REQUEUE_INTERVAL seconds
+STALE_JOB_SECONDS = 2 * JOB_TIMEOUT_SECONDS
+REQUEUE_INTERVAL = 60
+
+# Raw tables that can be exported: (table, columns, keyset columns in index order)
+DATASETS = {
+    'activity': ('activity_events', ('ts', 'platform', 'activity', 'engagement_level', 'engagements'),
+                 ('ts', 'id')),
+    'engagement': ('platform_engagement',
+                   ('ts', 'platform', 'impressions', 'engagements', 'engaged_users', 'response_minutes'),
+                   ('platform', 'ts')),
+    'followers': ('follower_snapshots', ('ts', 'platform', 'followers'), ('platform', 'ts')),
+}
+DATA_FORMATS = ('csv', 'parquet')
+
+# Chart images need the optional kaleido package (not in Requirement.txt) and a
+# Chrome or Chromium install it can drive (`kaleido_get_chrome` downloads one)
+CHARTS = ('follower_chart', 'platform_chart')
+CHART_FORMATS = ('png', 'pdf', 'svg')
+
+def chart_exports_available():
+    """Whether kaleido is installed, so chart jobs can be offered."""
+    return importlib.util.find_spec('kaleido') is not None
+
+# ========== JOB QUEUE ==========
+def enqueue_export(username, kind, fmt, days=30):
+    """Queue an export of one dataset or chart covering the last `days` days; returns the job id."""
+    formats = DATA_FORMATS if kind in DATASETS else CHART_FORMATS if kind in CHARTS else None
+    if formats is None:
+        raise ValueError(f"Unknown export {kind!r}")
+    if fmt not in formats:
+        raise ValueError(f"{kind} can't be exported as {fmt!r}")
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            INSERT INTO export_jobs (username, kind, format, params, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (username, kind, fmt, json.dumps({'days': days}), time.time()))
+    return cursor.lastrowid
+
+_JOB_COLUMNS = ('id', 'username', 'kind', 'format', 'params', 'status', 'path', 'rows', 'error',
+                'created_at', 'started_at', 'finished_at')
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(zip(_JOB_COLUMNS, row))
+    job['params'] = json.loads(job['params'])
+    return job
+
+def get_job(job_id):
+    row = get_connection().execute(f'SELECT {", ".join(_JOB_COLUMNS)} FROM export_jobs WHERE id = ?',
+                                   (job_id,)).fetchone()
+    return _job(row)
+
+def list_jobs(username, limit=10):
+    """A user's most recent jobs, newest first."""
+    rows = get_connection().execute(f'''
+        SELECT {", ".join(_JOB_COLUMNS)} FROM export_jobs
+        WHERE username = ?
+        ORDER BY id DESC LIMIT ?
+    ''', (username, limit)).fetchall()
+    return [_job(row) for row in rows]
+
+def has_pending_jobs(username):
+    """Whether the user has recent jobs still queued or running (older ones aren't waited on)."""
+    row = get_connection().execute('''
+        SELECT 1 FROM export_jobs
+        WHERE username = ? AND status IN ('queued', 'running') AND created_at > ?
+        LIMIT 1
+    ''', (username, time.time() - STALE_JOB_SECONDS)).fetchone()
+    return row is not None
+
+def claim_job():
+    """Atomically mark the oldest queued job as running and return it, or None."""
+    conn = get_connection()
+    with conn:
+        row = conn.execute(f'''
+            UPDATE export_jobs SET status = 'running', started_at = ?
+            WHERE id = (SELECT id FROM export_jobs WHERE status = 'queued' ORDER BY id LIMIT 1)
+            RETURNING {", ".join(_JOB_COLUMNS)}
+        ''', (time.time(),)).fetchone()
+    return _job(row)
+
+def finish_job(job_id, path=None, rows=None, error=None):
+    """Record a running job's outcome. Returns False if it had already finished."""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            UPDATE export_jobs SET status = ?, path = ?, rows = ?, error = ?, finished_at = ?
+            WHERE id = ? AND status = 'running'
+        ''', ('failed' if error else 'done', path, rows, error, time.time(), job_id))
+    return cursor.rowcount > 0
+
+def requeue_stale_jobs(timeout=STALE_JOB_SECONDS):
+    """Put jobs whose worker died mid-run back in the queue. Returns how many."""
+    conn = get_connection()
+    with conn:
+        return conn.execute('''
+            UPDATE export_jobs SET status = 'queued', started_at = NULL
+            WHERE status = 'running' AND started_at < ?
+        ''', (time.time() - timeout,)).rowcount
+
+# ========== RENDERING ==========
+def iter_dataset_chunks(kind, username, start, end, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a dataset as DataFrames of at most `chunk_rows` rows, in index order.
+
+    Each chunk continues from the last row of the previous one (keyset
+    pagination), so every query is a bounded index range scan.
+    """
+    import pandas as pd
+
+    table, columns, keys = DATASETS[kind]
+    selected = list(dict.fromkeys(columns + keys))
+    key_positions = [selected.index(key) for key in keys]
+    order = ', '.join(keys)
+    conn = get_connection()
+    after = None
+    while True:
+        keyset = f"AND ({order}) > ({', '.join('?' * len(keys))})" if after else ''
+        rows = conn.execute(f'''
+            SELECT {', '.join(selected)} FROM {table}
+            WHERE username = ? AND ts >= ? AND ts < ? {keyset}
+            ORDER BY {order} LIMIT ?
+        ''', (username, start, end, *(after or ()), chunk_rows)).fetchall()
+        if not rows:
+            return
+        after = tuple(rows[-1][i] for i in key_positions)
+        frame = pd.DataFrame.from_records(rows, columns=selected)[list(columns)]
+        frame['ts'] = pd.to_datetime(frame['ts'], unit='s', utc=True)
+        yield frame
+        if len(rows) < chunk_rows:
+            return
+
+def _parquet_schema(kind):
+    """Arrow schema for a dataset, fixed up front rather than inferred per chunk.
+
+    A chunk whose response_minutes are all NULL would otherwise infer a
+    null column and no longer match the file's schema.
+    """
+    import pyarrow as pa
+
+    types = {
+        'ts': pa.timestamp('s', tz='UTC'),
+        'platform': pa.string(),
+        'activity': pa.string(),
+        'engagement_level': pa.string(),
+        'impressions': pa.int64(),
+        'engagements': pa.int64(),
+        'engaged_users': pa.int64(),
+        'followers': pa.int64(),
+        'response_minutes': pa.float64(),
+    }
+    return pa.schema([(column, types[column]) for column in DATASETS[kind][1]])
+
+def write_dataset(kind, fmt, username, start, end, path, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Stream a dataset to a CSV or Parquet file chunk by chunk. Returns the row count."""
+    chunks = iter_dataset_chunks(kind, username, start, end, chunk_rows)
+    total = 0
+    if fmt == 'csv':
+        with open(path, 'w', newline='') as f:
+            for n, frame in enumerate(chunks):
+                frame.to_csv(f, header=n == 0, index=False)
+                total += len(frame)
+        return total
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _parquet_schema(kind)
+    # One row group per chunk; an export with no rows still gets the full schema
+    with pq.ParquetWriter(path, schema) as writer:
+        for frame in chunks:
+            writer.write_table(pa.Table.from_pandas(frame, schema=schema, preserve_index=False))
+            total += len(frame)
+    return total
+
+_renderer_started = False
+
+def _check_browser():
+    """Fail fast if kaleido can't find a browser, rather than waiting on one that never starts."""
+    try:
+        from choreographer.browsers.chromium import Chromium
+        found = Chromium.find_browser(skip_local=False)
+    except (ImportError, AttributeError, TypeError):
+        return  # Older kaleido, or choreographer changed; let kaleido report it
+    if not found:
+        raise RuntimeError("Chart exports need Chrome or Chromium; install one or run `kaleido_get_chrome`")
+
+def render_figure(fig, path, fmt):
+    """Write a figure image through this process's single Kaleido renderer.
+
+    Kaleido 1.x starts a headless browser per call unless a sync server is
+    running, so the first render starts one and every later job reuses it.
+    A render that hangs is cut off by the ExportWorkers watchdog.
+    """
+    global _renderer_started
+    try:
+        import kaleido
+    except ImportError:
+        raise RuntimeError("Chart exports need the kaleido package") from None
+    if not _renderer_started and hasattr(kaleido, 'start_sync_server'):
+        _check_browser()
+        kaleido.start_sync_server(silence_warnings=True)
+        _renderer_started = True
+    fig.write_image(path, format=fmt, width=1000, height=500)
+
+def write_chart(kind, fmt, username, start, end, path):
+    from charts import build_follower_figure, build_platform_figure, follower_chart_data, platform_chart_data
+
+    if kind == 'follower_chart':
+        data = follower_chart_data(username, start, end)
+        fig = build_follower_figure(data)
+    else:
+        data = platform_chart_data(username, start, end)
+        fig = build_platform_figure(data)
+    render_figure(fig, path, fmt)
+    return len(data)
+
+def job_path(job, export_dir):
+    return os.path.join(export_dir, f"{job['id']}-{job['kind']}.{job['format']}")
+
+def job_timeout(job):
+    return RENDER_TIMEOUT_SECONDS if job['kind'] in CHARTS else JOB_TIMEOUT_SECONDS
+
+def run_job(job, export_dir=None):
+    """Produce one job's file and record the outcome."""
+    export_dir = export_dir or EXPORT_DIR
+    os.makedirs(export_dir, exist_ok=True)
+    end = int(time.time()) + 1
+    start = end - job['params']['days'] * 86400
+    path = job_path(job, export_dir)
+    # Write under a temporary name so a half-written file is never offered for download
+    tmp_path = f"{path}.part"
+    try:
+        write = write_dataset if job['kind'] in DATASETS else write_chart
+        rows = write(job['kind'], job['format'], job['username'], start, end, tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as exc:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        finish_job(job['id'], error=f"{type(exc).__name__}: {exc}")
+        return False
+    finish_job(job['id'], path=os.path.abspath(path), rows=rows)
+    return True
+
+# ========== WORKERS ==========
+def run_worker(db_path, export_dir, poll_interval=1.0, stop_event=None, current=None):
+    """Claim and run jobs until stop_event is set (or forever).
+
+    `current`, if given, is a shared [job id, deadline] array the watchdog
+    reads; the worker fills it while a job runs and zeroes it afterwards.
+    """
+    database.configure_database(db_path)
+    last_requeue = 0.0
+    while stop_event is None or not stop_event.is_set():
+        if time.time() - last_requeue >= REQUEUE_INTERVAL:
+            requeue_stale_jobs()
+            last_requeue = time.time()
+        job = claim_job()
+        if job is None:
+            if stop_event is not None:
+                stop_event.wait(poll_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        if current is not None:
+            with current.get_lock():
+                current[0], current[1] = job['id'], time.time() + job_timeout(job)
+        run_job(job, export_dir)
+        if current is not None:
+            with current.get_lock():
+                current[0], current[1] = 0, 0
+
+class ExportWorkers:
+    """A pool of worker processes draining the export_jobs queue.
+
+    Workers are spawned rather than forked, so they start clean instead of
+    inheriting the Streamlit server's threads and open connections. A
+    watchdog thread fails any job that runs past its timeout, kills its
+    worker and starts a replacement, and likewise replaces workers that die.
+    """
+
+    def __init__(self, workers=1, export_dir=None, poll_interval=1.0):
+        self.workers = workers
+        self.export_dir = os.path.abspath(export_dir or EXPORT_DIR)
+        self.poll_interval = poll_interval
+        self.restarts = 0
+        self._context = multiprocessing.get_context('spawn')
+        self._stop = self._context.Event()
+        self._slots = []
+        self._watchdog = None
+
+    def _spawn(self, n, current):
+        process = self._context.Process(
+            target=run_worker, name=f"export-worker-{n}", daemon=True,
+            args=(os.path.abspath(database.DB_PATH), self.export_dir, self.poll_interval, self._stop, current))
+        process.start()
+        return process
+
+    def start(self):
+        requeue_stale_jobs()
+        for n in range(self.workers):
+            current = self._context.Array('d', 2)
+            self._slots.append([self._spawn(n, current), current])
+        self._watchdog = threading.Thread(target=self._watch, name='export-watchdog', daemon=True)
+        self._watchdog.start()
+        return self
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            for n, slot in enumerate(self._slots):
+                process, current = slot
+                with current.get_lock():
+                    job_id, deadline = int(current[0]), current[1]
+                timed_out = job_id and time.time() > deadline
+                if process.is_alive() and not timed_out:
+                    continue
+                if self._stop.is_set():
+                    return
+                if process.is_alive():
+                    process.kill()
+                process.join()
+                if job_id:
+                    self._fail(job_id, "Export timed out" if timed_out else "Export worker exited unexpectedly")
+                with current.get_lock():
+                    current[0], current[1] = 0, 0
+                slot[0] = self._spawn(n, current)
+                self.restarts += 1
+
+    def _fail(self, job_id, error):
+        job = get_job(job_id)
+        if job is not None and finish_job(job_id, error=error):
+            tmp_path = f"{job_path(job, self.export_dir)}.part"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def stop(self, timeout=10.0):
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout)
+        for process, _ in self._slots:
+            process.join(timeout)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run or queue dashboard export jobs.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    work_parser = subparsers.add_parser('work', help="run export workers until interrupted")
+    work_parser.add_argument('--workers', type=int, default=1)
+    enqueue_parser = subparsers.add_parser('enqueue', help="queue an export")
+    enqueue_parser.add_argument('username')
+    enqueue_parser.add_argument('kind', choices=list(DATASETS) + list(CHARTS))
+    enqueue_parser.add_argument('format', choices=DATA_FORMATS + CHART_FORMATS)
+    enqueue_parser.add_argument('--days', type=int, default=30)
+    status_parser = subparsers.add_parser('status', help="show a user's recent jobs")
+    status_parser.add_argument('username')
+    args = parser.parse_args()
+
+    if args.command == 'work':
+        pool = ExportWorkers(args.workers).start()
+        print(f"Started {args.workers} export workers writing to {pool.export_dir}.")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pool.stop()
+    elif args.command == 'enqueue':
+        print(f"Queued job {enqueue_export(args.username, args.kind, args.format, args.days)}.")
+    else:
+        for job in list_jobs(args.username):
+            print(f"{job['id']:>6} {job['kind']:<16} {job['format']:<8} {job['status']:<8} "
+                  f"{job['path'] or job['error'] or ''}")
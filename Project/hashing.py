@@ -0,0 +1,129 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import bcrypt
+from metrics import timed
+
+# bcrypt work factor; override with BCRYPT_ROUNDS
+DEFAULT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', 12))
+
+class HashingBusyError(RuntimeError):
+    """Raised when the hashing pool is saturated and cannot admit more work."""
+
+@timed('bcrypt_seconds')
+def hash_password(password, rounds=DEFAULT_ROUNDS):
+    """Hash a password with bcrypt at the given work factor."""
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds))
+
+@timed('bcrypt_seconds')
+def check_password(password, hashed_password):
+    """Check a password against a stored bcrypt hash."""
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
+
+class HashingService:
+    """Runs bcrypt off the caller's thread on a bounded worker pool.
+
+    bcrypt releases the GIL, so the default thread pool already spreads work
+    across cores; pass use_processes=True to isolate it in worker processes.
+    At most max_pending jobs are admitted at once. Further submissions wait up
+    to admission_timeout seconds for a slot (0 rejects immediately) and then
+    raise HashingBusyError.
+    """
+
+    def __init__(self, max_workers=None, rounds=DEFAULT_ROUNDS, max_pending=None,
+                 admission_timeout=10.0, use_processes=False):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.rounds = rounds
+        self.max_pending = max_pending or self.max_workers * 4
+        self.admission_timeout = admission_timeout
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=self.max_workers)
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._rejected = 0
+
+    def _submit(self, fn, *args):
+        """Admit a job if a slot is free and schedule it on the pool."""
+        if self.admission_timeout > 0:
+            admitted = self._slots.acquire(timeout=self.admission_timeout)
+        else:
+            admitted = self._slots.acquire(blocking=False)
+        if not admitted:
+            self._rejected += 1
+            raise HashingBusyError('Password hashing pool is saturated')
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    # concurrent.futures entry points
+    def submit_hash(self, password):
+        """Schedule hashing a password; returns a Future of the hash."""
+        return self._submit(hash_password, password, self.rounds)
+
+    def submit_verify(self, password, hashed_password):
+        """Schedule a password check; returns a Future of the result."""
+        return self._submit(check_password, password, hashed_password)
+
+    # blocking entry points
+    def hash(self, password):
+        """Hash a password on the pool and wait for the result."""
+        return self.submit_hash(password).result()
+
+    def verify(self, password, hashed_password):
+        """Check a password on the pool and wait for the result."""
+        return self.submit_verify(password, hashed_password).result()
+
+    # asyncio entry points
+    async def hash_async(self, password):
+        """Hash a password on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(await self._admit_async(self.submit_hash, password))
+
+    async def verify_async(self, password, hashed_password):
+        """Check a password on the pool without blocking the event loop."""
+        return await asyncio.wrap_future(
+            await self._admit_async(self.submit_verify, password, hashed_password))
+
+    async def _admit_async(self, submit, *args):
+        """Wait for admission off the event loop so a full pool doesn't stall it."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, submit, *args)
+
+    def stats(self):
+        """Current admission counters."""
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'rejected': self._rejected,
+        }
+
+    def shutdown(self, wait=True):
+        """Stop the worker pool."""
+        self._executor.shutdown(wait=wait)
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_hashing_service():
+    """Get the process-wide hashing service, starting it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = HashingService()
+    return _service
+
+def configure_hashing(**kwargs):
+    """Replace the process-wide hashing service (e.g. to change the work factor)."""
+    global _service
+    with _service_lock:
+        old_service = _service
+        _service = HashingService(**kwargs)
+    if old_service is not None:
+        old_service.shutdown(wait=False)
+    return _service
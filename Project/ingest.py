@@ -0,0 +1,283 @@
+import json
+import logging
+import queue
+import socketserver
+import threading
+import time
+import numpy as np
+import pandas as pd
+from analytics import ENGAGEMENT_LEVELS, PLATFORMS, create_analytics_tables
+from database import create_connection
+from metrics import increment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_FLUSH_INTERVAL = 0.25
+DEFAULT_QUEUE_CHUNKS = 64
+
+# Largest accepted ts (2100-01-01) and count; anything beyond is rejected rather than
+# wrapped by the int64 cast
+MAX_TIMESTAMP = 4_102_444_800
+MAX_COUNT = 2 ** 53
+
+# Columns written for each event kind, in table order (after username, platform, ts)
+EVENT_KINDS = {
+    'activity': ('activity', 'engagement_level', 'engagements'),
+    'engagement': ('impressions', 'engagements', 'engaged_users', 'response_minutes'),
+    'followers': ('followers',),
+}
+
+_INSERT_SQL = {
+    'activity': '''
+        INSERT INTO activity_events (username, platform, ts, activity, engagement_level, engagements)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+    'engagement': '''
+        INSERT OR REPLACE INTO platform_engagement
+            (username, platform, ts, impressions, engagements, engaged_users, response_minutes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'followers': '''
+        INSERT OR REPLACE INTO follower_snapshots (username, platform, ts, followers)
+        VALUES (?, ?, ?, ?)
+    ''',
+}
+
+class IngestBusyError(RuntimeError):
+    """Raised when the ingest queue stays full for longer than the submit timeout."""
+
+def _count_column(frame, name, required):
+    """Integer column with a non-negativity mask; missing optional values become 0."""
+    values = pd.to_numeric(frame[name], errors='coerce')
+    valid = values.notna() if required else pd.Series(True, index=frame.index)
+    values = values.fillna(0)
+    valid &= (values >= 0) & (values <= MAX_COUNT)
+    return values.where(valid, 0).astype(np.int64), valid
+
+def validate_events(events):
+    """Validate a batch of event dicts column-wise.
+
+    Events carry username, platform, ts (unix seconds) and a kind of
+    'activity' (the default), 'engagement' or 'followers' with that kind's
+    fields. Anything that isn't a dict is rejected. Returns
+    ({kind: [row tuples]}, rejected count).
+    """
+    if not events:
+        return {}, 0
+    columns = {'kind', 'username', 'platform', 'ts'}
+    for fields in EVENT_KINDS.values():
+        columns.update(fields)
+    records = [event if isinstance(event, dict) else {} for event in events]
+    frame = pd.DataFrame.from_records(records).reindex(columns=sorted(columns))
+
+    kind = frame['kind'].fillna('activity')
+    usernames = frame['username'].astype(str)
+    ts = pd.to_numeric(frame['ts'], errors='coerce')
+    valid = (
+        frame['username'].notna() & (usernames.str.len() > 0)
+        & frame['platform'].isin(PLATFORMS)
+        & ts.notna() & (ts > 0) & (ts <= MAX_TIMESTAMP)
+    )
+    ts = ts.where(valid, 0).astype(np.int64)
+
+    rows = {}
+    accepted = 0
+    for name, fields in EVENT_KINDS.items():
+        mask = valid & (kind == name)
+        if not mask.any():
+            continue
+        out = [usernames, frame['platform'], ts]
+        if name == 'activity':
+            out.append(frame['activity'].astype(str))
+            out.append(frame['engagement_level'])
+            mask &= frame['activity'].notna() & frame['engagement_level'].isin(ENGAGEMENT_LEVELS)
+            engagements, ok = _count_column(frame, 'engagements', required=False)
+            out.append(engagements)
+            mask &= ok
+        elif name == 'engagement':
+            for field in ('impressions', 'engagements', 'engaged_users'):
+                values, ok = _count_column(frame, field, required=False)
+                out.append(values)
+                mask &= ok
+            response = pd.to_numeric(frame['response_minutes'], errors='coerce')
+            out.append(response.astype(object).where(response.notna(), None))
+            mask &= response.isna() | ((response >= 0) & np.isfinite(response))
+        else:
+            followers, ok = _count_column(frame, 'followers', required=True)
+            out.append(followers)
+            mask &= ok
+        selected = [column[mask].tolist() for column in out]
+        rows[name] = list(zip(*selected))
+        accepted += len(rows[name])
+    return rows, len(events) - accepted
+
+class EventIngestor:
+    """Accepts analytics events from any thread and writes them from one writer thread.
+
+    Producers hand over events in chunks through a bounded queue; when it is
+    full, submit() blocks (up to `submit_timeout`) so producers slow down
+    instead of growing memory. The writer drains the queue into micro-batches
+    of up to `batch_size` events, validates them column-wise and writes each
+    batch with executemany in one transaction on its own WAL connection, so
+    dashboard readers are never blocked by it.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_queued_chunks=DEFAULT_QUEUE_CHUNKS, submit_timeout=30.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.submit_timeout = submit_timeout
+        self.stats = {'received': 0, 'written': 0, 'rejected': 0, 'failed': 0, 'batches': 0}
+        self._queue = queue.Queue(maxsize=max_queued_chunks)
+        self._stats_lock = threading.Lock()
+        self._writer = None
+
+    def start(self):
+        """Create the tables if needed and start the writer thread."""
+        create_analytics_tables()
+        self._writer = threading.Thread(target=self._run, name='ingest-writer', daemon=True)
+        self._writer.start()
+        return self
+
+    def submit(self, events):
+        """Queue a list of events (or a single event dict) for writing."""
+        if isinstance(events, dict):
+            events = [events]
+        if not events:
+            return
+        try:
+            self._queue.put(list(events), timeout=self.submit_timeout)
+        except queue.Full:
+            raise IngestBusyError('Ingest queue is full') from None
+        with self._stats_lock:
+            self.stats['received'] += len(events)
+
+    def stop(self):
+        """Flush everything queued so far and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._queue.put(None)
+        self._writer.join()
+        self._writer = None
+
+    def _run(self):
+        # A dedicated connection, so the pool's per-thread connections never write here
+        conn = create_connection()
+        try:
+            stopping = False
+            while not stopping:
+                try:
+                    chunk = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    continue
+                if chunk is None:
+                    break
+                batch = chunk
+                # Gather whatever else is already queued, up to one micro-batch
+                while len(batch) < self.batch_size:
+                    try:
+                        chunk = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if chunk is None:
+                        stopping = True
+                        break
+                    batch.extend(chunk)
+                self._write(conn, batch)
+        finally:
+            conn.close()
+
+    def _write(self, conn, batch):
+        try:
+            rows, rejected = validate_events(batch)
+            with conn:
+                for kind, params in rows.items():
+                    conn.executemany(_INSERT_SQL[kind], params)
+        except Exception:
+            # Drop this batch but keep the writer alive for the ones after it
+            logger.exception("Failed to write a batch of %d events", len(batch))
+            increment('ingest_failed_events_total', len(batch))
+            with self._stats_lock:
+                self.stats['failed'] += len(batch)
+                self.stats['batches'] += 1
+            return
+        with self._stats_lock:
+            self.stats['written'] += sum(len(params) for params in rows.values())
+            self.stats['rejected'] += rejected
+            self.stats['batches'] += 1
+
+# ========== SOURCES ==========
+def iter_file_events(path, chunk_size=DEFAULT_BATCH_SIZE):
+    """Yield lists of events from a JSON-lines file, `chunk_size` lines at a time."""
+    chunk = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                chunk.append(json.loads(line))
+            except json.JSONDecodeError:
+                chunk.append({})  # counted as rejected by validation
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def ingest_file(path, ingestor):
+    """Feed a JSON-lines file through a running ingestor."""
+    for chunk in iter_file_events(path, ingestor.batch_size):
+        ingestor.submit(chunk)
+
+class _EventStreamHandler(socketserver.StreamRequestHandler):
+    """Reads JSON-lines events from a client connection."""
+
+    def handle(self):
+        chunk = []
+        for line in self.rfile:
+            try:
+                chunk.append(json.loads(line))
+            except json.JSONDecodeError:
+                chunk.append({})
+            if len(chunk) >= 1000:
+                # Blocks when the queue is full, which pushes back on the client via TCP
+                self.server.ingestor.submit(chunk)
+                chunk = []
+        if chunk:
+            self.server.ingestor.submit(chunk)
+
+def serve_socket(ingestor, host='127.0.0.1', port=9009):
+    """Accept JSON-lines events over TCP until interrupted."""
+    with socketserver.ThreadingTCPServer((host, port), _EventStreamHandler) as server:
+        server.daemon_threads = True
+        server.ingestor = ingestor
+        server.serve_forever()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest analytics events.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    load_parser = subparsers.add_parser('load', help="ingest a JSON-lines file")
+    load_parser.add_argument('path')
+    serve_parser = subparsers.add_parser('serve', help="accept JSON-lines events over TCP")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=9009)
+    args = parser.parse_args()
+
+    ingestor = EventIngestor().start()
+    start = time.perf_counter()
+    try:
+        if args.command == 'load':
+            ingest_file(args.path, ingestor)
+        else:
+            serve_socket(ingestor, args.host, args.port)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingestor.stop()
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {ingestor.stats['written']} events ({ingestor.stats['rejected']} rejected, "
+          f"{ingestor.stats['failed']} failed to write) in {elapsed:.2f}s")
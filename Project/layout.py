@@ -0,0 +1,139 @@
+import streamlit as st
+
+# ========== FIXED CSS - WON'T BREAK INPUTS ==========
+# Module constant: built once per process instead of on every script rerun
+APP_CSS = """
+<style>
+    /* Main background */
+    .stApp {
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        min-height: 100vh;
+    }
+    
+    /* Container for auth forms */
+    .auth-wrapper {
+        display: flex;
+        justify-content: center;
+        align-items: center;
+        min-height: 100vh;
+        padding: 20px;
+    }
+    
+    .auth-container {
+        background: white;
+        border-radius: 16px;
+        box-shadow: 0 20px 60px rgba(0, 0, 0, 0.3);
+        padding: 40px;
+        width: 100%;
+        max-width: 440px;
+    }
+    
+    /* Modern header */
+    .dashboard-header {
+        background: white;
+        padding: 16px 0;
+        box-shadow: 0 2px 10px rgba(0,0,0,.08);
+        position: sticky;
+        top: 0;
+        z-index: 100;
+    }
+    
+    /* Card styling */
+    .analytics-card {
+        background: white;
+        border-radius: 16px;
+        padding: 24px;
+        box-shadow: 0 4px 20px rgba(0,0,0,.08);
+        margin-bottom: 24px;
+        border: 1px solid rgba(0,0,0,.05);
+        transition: transform 0.3s ease, box-shadow 0.3s ease;
+    }
+    
+    .analytics-card:hover {
+        transform: translateY(-4px);
+        box-shadow: 0 12px 30px rgba(0,0,0,.12);
+    }
+    
+    /* Metric cards */
+    .metric-card {
+        background: white;
+        border-radius: 12px;
+        padding: 20px;
+        text-align: center;
+        box-shadow: 0 4px 12px rgba(0,0,0,.05);
+        border-top: 4px solid #667eea;
+        transition: all 0.3s ease;
+    }
+    
+    .metric-card:hover {
+        box-shadow: 0 8px 20px rgba(0,0,0,.1);
+    }
+    
+    /* Hide default Streamlit elements */
+    #MainMenu {visibility: hidden;}
+    footer {visibility: hidden;}
+    .stDeployButton {display: none;}
+    
+    /* Custom titles */
+    .brand-title {
+        font-size: 32px;
+        font-weight: 800;
+        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+        -webkit-background-clip: text;
+        -webkit-text-fill-color: transparent;
+        margin-bottom: 8px;
+    }
+    
+    .section-title {
+        font-size: 20px;
+        font-weight: 700;
+        color: #2d3748;
+        margin: 0 0 16px 0;
+    }
+    
+    /* Status indicators */
+    .status-indicator {
+        display: inline-block;
+        width: 10px;
+        height: 10px;
+        border-radius: 50%;
+        margin-right: 8px;
+    }
+    
+    .status-active { background-color: #48bb78; }
+    .status-inactive { background-color: #e53e3e; }
+    
+    /* Activity timeline */
+    .activity-item {
+        padding: 12px 0;
+        border-bottom: 1px solid #e2e8f0;
+        display: flex;
+        align-items: center;
+    }
+    
+    .activity-item:last-child {
+        border-bottom: none;
+    }
+</style>
+"""
+
+def inject_styles():
+    """Emit the app stylesheet; Streamlit needs it re-sent on every run."""
+    st.markdown(APP_CSS, unsafe_allow_html=True)
+
+# ========== MODERN HEADER ==========
+def show_header():
+    st.markdown("""
+    <div class="main-header">
+        <div style="max-width: 1200px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center;">
+            <div style="display: flex; align-items: center;">
+                <h1 style="margin: 0; font-size: 26px; font-weight: 700; letter-spacing: -0.5px;">Social Analytics</h1>
+                <span style="margin-left: 12px; font-size: 22px;">📈</span>
+            </div>
+            <div style="color: rgba(255,255,255,0.9); font-weight: 500; font-size: 15px;">
+                Real-time Social Media Insights
+            </div>
+        </div>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("<div style='height: 70px;'></div>", unsafe_allow_html=True)
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Set METRICS=0 to turn instrumentation into no-ops
+METRICS_ENABLED = os.environ.get('METRICS', '1') != '0'
+
+# Observations kept per histogram for the quantiles
+HISTOGRAM_WINDOW = 1024
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class Histogram:
+    """Latest observations in a fixed-size ring buffer, plus lifetime count and sum.
+
+    Recording is a lock and a list store; quantiles are only computed when
+    someone reads them, so the cost lands on the metrics page, not the hot path.
+    """
+
+    def __init__(self, size=HISTOGRAM_WINDOW):
+        self.size = size
+        self.count = 0
+        self.total = 0.0
+        self._samples = [0.0] * size
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._samples[self.count % self.size] = value
+            self.count += 1
+            self.total += value
+
+    def quantiles(self, qs=QUANTILES):
+        """{q: value} over the observations still in the window."""
+        with self._lock:
+            window = sorted(self._samples[:min(self.count, self.size)])
+        if not window:
+            return {q: 0.0 for q in qs}
+        return {q: window[min(len(window) - 1, int(q * len(window)))] for q in qs}
+
+_histograms = {}
+_counters = {}
+_gauges = {}
+_lock = threading.Lock()
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def histogram(name, **labels):
+    """The histogram for a metric name and label set, created on first use."""
+    key = _key(name, labels)
+    hist = _histograms.get(key)
+    if hist is None:
+        with _lock:
+            hist = _histograms.setdefault(key, Histogram())
+    return hist
+
+def observe(name, value, **labels):
+    """Record one observation (seconds, for timings)."""
+    if METRICS_ENABLED:
+        histogram(name, **labels).observe(value)
+
+def increment(name, amount=1, **labels):
+    """Add to a counter."""
+    if METRICS_ENABLED:
+        key = _key(name, labels)
+        with _lock:
+            _counters[key] = _counters.get(key, 0) + amount
+
+def register_gauge(name, read):
+    """Report read() as a gauge whenever metrics are exported."""
+    _gauges[name] = read
+
+@contextmanager
+def timer(name, **labels):
+    """Time the enclosed block into a histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+def timed(name, **labels):
+    """Decorator timing each call into `name`, labelled with the function name."""
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+        hist = histogram(name, function=fn.__name__, **labels)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                hist.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+def snapshot():
+    """Current values as plain rows, e.g. for a table."""
+    rows = []
+    for (name, labels), hist in sorted(_histograms.items()):
+        if hist.count:
+            quantiles = hist.quantiles()
+            rows.append({'metric': name, 'labels': dict(labels), 'count': hist.count, 'sum': hist.total,
+                         **{f"p{int(q * 100)}": value for q, value in quantiles.items()}})
+    for (name, labels), value in sorted(_counters.items()):
+        rows.append({'metric': name, 'labels': dict(labels), 'count': value})
+    for name, read in sorted(_gauges.items()):
+        rows.append({'metric': name, 'labels': {}, 'count': read()})
+    return rows
+
+def _format_labels(labels, **extra):
+    labels = {**labels, **extra}
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+def prometheus_text():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    typed = set()
+
+    def declare(name, kind):
+        if name not in typed:
+            typed.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), hist in sorted(_histograms.items()):
+        labels = dict(labels)
+        declare(name, 'summary')
+        for q, value in hist.quantiles().items():
+            lines.append(f"{name}{_format_labels(labels, quantile=q)} {value:.6g}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {hist.total:.6g}")
+        lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+    for (name, labels), value in sorted(_counters.items()):
+        declare(name, 'counter')
+        lines.append(f"{name}{_format_labels(dict(labels))} {value}")
+    for name, read in sorted(_gauges.items()):
+        declare(name, 'gauge')
+        lines.append(f"{name} {read()}")
+    return '\n'.join(lines) + '\n'
+
+def dump(path):
+    """Write prometheus_text() to a file atomically (e.g. for node_exporter's textfile collector)."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(prometheus_text())
+    os.replace(tmp_path, path)
+
+def start_dump_thread(path, interval=15.0):
+    """Dump metrics to `path` every `interval` seconds from a daemon thread."""
+    def run():
+        while True:
+            time.sleep(interval)
+            dump(path)
+
+    thread = threading.Thread(target=run, name='metrics-dump', daemon=True)
+    thread.start()
+    return thread
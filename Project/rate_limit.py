@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from database import get_connection
+
+class TokenBucketLimiter:
+    """Token buckets per key, kept in an LRU-bounded dict.
+
+    Each key holds up to `capacity` tokens and regains `refill_per_second`;
+    an attempt spends one. Evicted keys simply start again with a full
+    bucket, so memory stays bounded whatever keys an attacker invents.
+    With persist=True, buckets are written to SQLite every `flush_interval`
+    seconds and read back on a miss, so limits survive restarts and are
+    roughly shared between app processes. Stored buckets that have had time
+    to refill completely are pruned every `prune_interval` seconds.
+    """
+
+    def __init__(self, scope, capacity, refill_per_second, max_keys=100_000,
+                 persist=False, flush_interval=5.0, prune_interval=600.0):
+        self.scope = scope
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.max_keys = max_keys
+        self.persist = persist
+        self.flush_interval = flush_interval
+        self.prune_interval = prune_interval
+        self.allowed = 0
+        self.rejected = 0
+        self.evicted = 0
+        self._buckets = OrderedDict()
+        self._dirty = set()
+        self._last_flush = time.time()
+        self._last_prune = time.time()
+        self._lock = threading.Lock()
+
+    def consume(self, key, now=None):
+        """Spend a token for `key`. Returns 0 if allowed, else seconds until one is available."""
+        now = now or time.time()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None and self.persist:
+                bucket = self._load(key)
+            if bucket is None:
+                tokens = float(self.capacity)
+            else:
+                tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.refill_per_second)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0.0
+                self.allowed += 1
+            else:
+                retry_after = (1 - tokens) / self.refill_per_second
+                self.rejected += 1
+            self._store(key, tokens, now)
+            flush = self.persist and now - self._last_flush >= self.flush_interval
+        if flush:
+            self.flush()
+        return retry_after
+
+    def reset(self, key):
+        """Give a key a full bucket again (e.g. after a successful login)."""
+        with self._lock:
+            if key in self._buckets:
+                self._store(key, float(self.capacity), time.time())
+
+    def _store(self, key, tokens, now):
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        if self.persist:
+            self._dirty.add(key)
+        while len(self._buckets) > self.max_keys:
+            evicted_key, _ = self._buckets.popitem(last=False)
+            self._dirty.discard(evicted_key)
+            self.evicted += 1
+
+    def _load(self, key):
+        row = get_connection().execute(
+            'SELECT tokens, updated_at FROM rate_limit_buckets WHERE scope = ? AND key = ?',
+            (self.scope, key)).fetchone()
+        return tuple(row) if row else None
+
+    def flush(self):
+        """Write buckets changed since the last flush to SQLite, pruning now and then."""
+        with self._lock:
+            rows = [(self.scope, key) + self._buckets[key] for key in self._dirty if key in self._buckets]
+            self._dirty.clear()
+            self._last_flush = time.time()
+            prune = self._last_flush - self._last_prune >= self.prune_interval
+            if prune:
+                self._last_prune = self._last_flush
+        if rows:
+            conn = get_connection()
+            with conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO rate_limit_buckets (scope, key, tokens, updated_at)
+                    VALUES (?, ?, ?, ?)
+                ''', rows)
+        if prune:
+            self.prune()
+
+    def prune(self, now=None):
+        """Delete stored buckets that have refilled completely; they mean the same as no bucket.
+
+        Returns how many were deleted.
+        """
+        cutoff = (now or time.time()) - self.capacity / self.refill_per_second
+        conn = get_connection()
+        with conn:
+            return conn.execute('DELETE FROM rate_limit_buckets WHERE scope = ? AND updated_at < ?',
+                                (self.scope, cutoff)).rowcount
+
+    def stats(self):
+        with self._lock:
+            return {'allowed': self.allowed, 'rejected': self.rejected,
+                    'evicted': self.evicted, 'keys': len(self._buckets)}
+
+class LoginRateLimiter:
+    """Per-client and per-username limits on login attempts.
+
+    check() runs before any database read or bcrypt work. The client bucket
+    is checked first, so one client spraying random usernames is stopped
+    without creating a bucket for each name.
+    """
+
+    def __init__(self, user_capacity=5, user_refill_per_second=1 / 12,
+                 client_capacity=20, client_refill_per_second=1 / 3,
+                 max_keys=100_000, persist=False):
+        self.clients = TokenBucketLimiter('client', client_capacity, client_refill_per_second,
+                                          max_keys, persist)
+        self.users = TokenBucketLimiter('user', user_capacity, user_refill_per_second,
+                                        max_keys, persist)
+
+    def check(self, username, client=None):
+        """Returns 0 if the attempt may go ahead, else seconds to wait before retrying."""
+        if client:
+            retry_after = self.clients.consume(client)
+            if retry_after:
+                return retry_after
+        return self.users.consume(username)
+
+    def record_success(self, username):
+        """A correct password ends the username's lockout window."""
+        self.users.reset(username)
+
+    def stats(self):
+        return {'clients': self.clients.stats(), 'users': self.users.stats()}
+
+# Persist buckets to SQLite when RATE_LIMIT_PERSIST=1
+_limiter = LoginRateLimiter(persist=os.environ.get('RATE_LIMIT_PERSIST') == '1')
+
+def get_login_limiter():
+    """The process-wide login rate limiter."""
+    return _limiter
+
+def configure_login_limiter(**kwargs):
+    """Replace the process-wide login rate limiter (e.g. with different limits)."""
+    global _limiter
+    _limiter = LoginRateLimiter(**kwargs)
+    return _limiter
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from metrics import register_gauge
+
+def result_size(value):
+    """Rough size in bytes of a query result (arrays, frames and containers of them)."""
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):
+        return int(value.memory_usage(index=True, deep=False).sum())
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(result_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(result_size(v) for v in value)
+    return sys.getsizeof(value)
+
+class ResultCache:
+    """Process-wide LRU cache of query results keyed by (user, metric, window, data version).
+
+    Concurrent misses for the same key are computed once: the first caller
+    runs the query and the rest wait for its result. Storing a new data
+    version drops the older one for that user, metric and window. Results are
+    shared between sessions and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, username, metric, window, version, compute):
+        """Return the cached result for this key, running compute() once on a miss."""
+        key = (username, metric, window, version)
+        leader = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            future = self._inflight.get(key)
+            if future is None:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                leader = True
+            else:
+                self.waits += 1
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, value)
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value):
+        slot = key[:3]
+        old_version = self._versions.get(slot)
+        if old_version is not None and old_version != key[3]:
+            self._drop(slot + (old_version,))
+        self._versions[slot] = key[3]
+        size = result_size(value)
+        self._entries[key] = (value, size)
+        self.bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+            if self._versions.get(key[:3]) == key[3]:
+                del self._versions[key[:3]]
+
+    def invalidate(self, username):
+        """Drop every cached result for one user."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'waits': self.waits,
+                    'evictions': self.evictions, 'size': len(self._entries), 'bytes': self.bytes}
+
+# Set RESULT_CACHE=0 to run every dashboard query on every rerun (for comparison)
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE', '1') != '0'
+result_cache = ResultCache(max_bytes=int(os.environ.get('RESULT_CACHE_MB', 64)) * 1024 * 1024)
+
+for _stat in ('hits', 'misses', 'waits', 'evictions', 'size', 'bytes'):
+    register_gauge(f'result_cache_{_stat}', lambda stat=_stat: result_cache.stats()[stat])
+
+def cached_result(username, metric, window, version, compute):
+    """Get a query result through the shared cache (or compute it directly when disabled)."""
+    if not RESULT_CACHE_ENABLED:
+        return compute()
+    return result_cache.get(username, metric, window, version, compute)
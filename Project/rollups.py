@@ -0,0 +1,200 @@
+import time
+from analytics import DAY, HOUR, PLATFORMS, _pending_since
+from database import get_connection
+from metrics import timed
+
+# Rollup tables, finest first; each level is built from the one before it
+GRANULARITIES = ('hourly', 'daily', 'monthly')
+
+_ROLLUP_COLUMNS = '''
+    username, platform, bucket, impressions, engagements, engaged_users,
+    response_minutes_sum, response_count, followers, followers_ts,
+    activity_count, activity_engagements
+'''
+
+def create_rollup_tables():
+    """Create the hourly, daily and monthly rollup tables and the watermark table."""
+    conn = get_connection()
+    with conn:
+        for granularity in GRANULARITIES:
+            conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS rollup_{granularity} (
+                    username TEXT NOT NULL,
+                    platform TEXT NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    impressions INTEGER NOT NULL DEFAULT 0,
+                    engagements INTEGER NOT NULL DEFAULT 0,
+                    engaged_users INTEGER NOT NULL DEFAULT 0,
+                    response_minutes_sum REAL NOT NULL DEFAULT 0,
+                    response_count INTEGER NOT NULL DEFAULT 0,
+                    followers INTEGER,
+                    followers_ts INTEGER,
+                    activity_count INTEGER NOT NULL DEFAULT 0,
+                    activity_engagements INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (username, bucket, platform)
+                ) WITHOUT ROWID
+            ''')
+        # analytics_changes.version last folded into each user's rollups
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS rollup_watermarks (
+                username TEXT PRIMARY KEY,
+                watermark INTEGER NOT NULL
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_follower_snapshots_user_ts ON follower_snapshots (username, ts)')
+
+def _rebuild_hourly(conn, username, start):
+    """Re-aggregate raw rows with ts >= start into hourly buckets."""
+    conn.execute(f'''
+        INSERT OR REPLACE INTO rollup_hourly ({_ROLLUP_COLUMNS})
+        SELECT ?, platform, bucket, SUM(impressions), SUM(engagements), SUM(engaged_users),
+               SUM(response_sum), SUM(response_count), followers, MAX(followers_ts),
+               SUM(activity_count), SUM(activity_engagements)
+        FROM (
+            SELECT platform, ts - ts % 3600 AS bucket, impressions, engagements, engaged_users,
+                   COALESCE(response_minutes, 0) AS response_sum,
+                   response_minutes IS NOT NULL AS response_count,
+                   NULL AS followers, NULL AS followers_ts,
+                   0 AS activity_count, 0 AS activity_engagements
+            FROM platform_engagement WHERE username = ? AND ts >= ?
+            UNION ALL
+            SELECT platform, ts - ts % 3600, 0, 0, 0, 0, 0, followers, ts, 0, 0
+            FROM follower_snapshots WHERE username = ? AND ts >= ?
+            UNION ALL
+            SELECT platform, ts - ts % 3600, 0, 0, 0, 0, 0, NULL, NULL, 1, engagements
+            FROM activity_events WHERE username = ? AND ts >= ?
+        )
+        GROUP BY platform, bucket
+    ''', (username, username, start, username, start, username, start))
+
+def _rebuild_level(conn, username, target, source, bucket_expr, start):
+    """Re-aggregate `source` rollup rows with bucket >= start into `target` buckets."""
+    # followers is a bare column: SQLite takes it from the row with MAX(followers_ts)
+    conn.execute(f'''
+        INSERT OR REPLACE INTO rollup_{target} ({_ROLLUP_COLUMNS})
+        SELECT username, platform, {bucket_expr} AS new_bucket,
+               SUM(impressions), SUM(engagements), SUM(engaged_users),
+               SUM(response_minutes_sum), SUM(response_count), followers, MAX(followers_ts),
+               SUM(activity_count), SUM(activity_engagements)
+        FROM rollup_{source}
+        WHERE username = ? AND bucket >= ?
+        GROUP BY platform, new_bucket
+    ''', (username, start))
+
+def _month_start(conn, ts):
+    return conn.execute("SELECT CAST(strftime('%s', ?, 'unixepoch', 'start of month') AS INTEGER)",
+                        (ts,)).fetchone()[0]
+
+@timed('db_call_seconds')
+def refresh_rollups(username, full=False):
+    """Fold a user's raw analytics written since the last refresh into the rollups.
+
+    Every hour, day and month bucket from the oldest changed raw timestamp
+    onwards is rebuilt (see analytics.create_change_tracking), so the cost
+    depends on how far back the new data reaches rather than on total
+    history, and late or backfilled rows are picked up like any other.
+    Returns True if anything was refreshed.
+    """
+    conn = get_connection()
+    # The common case, nothing new, is one read without the write lock
+    if not full and _pending_since(conn, username, 'rollups_from') is None:
+        return False
+    # Take the write lock before re-reading so no change lands between reading and clearing the mark
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT version, rollups_from FROM analytics_changes WHERE username = ?',
+                           (username,)).fetchone()
+        if row is None or (row[1] is None and not full):
+            conn.execute('COMMIT')
+            return False
+        start = 0 if full else row[1] - row[1] % HOUR
+        day_start = start - start % DAY
+        month_start = _month_start(conn, day_start)
+        for granularity, bucket_start in zip(GRANULARITIES, (start, day_start, month_start)):
+            conn.execute(f'DELETE FROM rollup_{granularity} WHERE username = ? AND bucket >= ?',
+                         (username, bucket_start))
+        _rebuild_hourly(conn, username, start)
+        _rebuild_level(conn, username, 'daily', 'hourly', 'bucket - bucket % 86400', day_start)
+        _rebuild_level(conn, username, 'monthly', 'daily',
+                       "CAST(strftime('%s', bucket, 'unixepoch', 'start of month') AS INTEGER)", month_start)
+        conn.execute('UPDATE analytics_changes SET rollups_from = NULL WHERE username = ?', (username,))
+        conn.execute('INSERT OR REPLACE INTO rollup_watermarks (username, watermark) VALUES (?, ?)',
+                     (username, row[0]))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return True
+
+def get_watermark(username):
+    """Change version folded into a user's rollups, or None if they have no data; doubles as a data version."""
+    row = get_connection().execute('SELECT watermark FROM rollup_watermarks WHERE username = ?',
+                                   (username,)).fetchone()
+    return row[0] if row else None
+
+def refresh_all_rollups(full=False):
+    """Refresh rollups for every user with analytics data (e.g. from a scheduled job)."""
+    conn = get_connection()
+    usernames = [row[0] for row in conn.execute('SELECT username FROM analytics_changes')]
+    return sum(refresh_rollups(username, full) for username in usernames)
+
+# ========== ROLLUP-BACKED QUERIES ==========
+def window_totals(username, start, end, granularity='hourly'):
+    """Engagement totals for buckets with start <= bucket < end."""
+    row = get_connection().execute(f'''
+        SELECT COALESCE(SUM(impressions), 0), COALESCE(SUM(engagements), 0),
+               COALESCE(SUM(engaged_users), 0), COALESCE(SUM(response_minutes_sum), 0),
+               COALESCE(SUM(response_count), 0)
+        FROM rollup_{granularity}
+        WHERE username = ? AND bucket >= ? AND bucket < ?
+    ''', (username, start, end)).fetchone()
+    impressions, engagements, engaged_users, response_sum, response_count = row
+    return {
+        'impressions': impressions,
+        'engagements': engagements,
+        'engaged_users': engaged_users,
+        'engagement_rate': engagements / impressions * 100 if impressions else 0.0,
+        'response_minutes': response_sum / response_count if response_count else 0.0,
+    }
+
+def total_followers(username, at):
+    """Sum of each platform's latest daily follower close at or before `at`."""
+    conn = get_connection()
+    total = 0
+    for platform in PLATFORMS:
+        row = conn.execute('''
+            SELECT followers FROM rollup_daily
+            WHERE username = ? AND bucket <= ? AND platform = ? AND followers IS NOT NULL
+            ORDER BY bucket DESC LIMIT 1
+        ''', (username, at, platform)).fetchone()
+        if row:
+            total += row[0]
+    return total
+
+@timed('db_call_seconds')
+def get_dashboard_metrics(username, now=None):
+    """Dashboard headline numbers served from the rollups.
+
+    Day windows are the last 24 hourly buckets; week windows are the last
+    7 daily buckets, in both cases including the current partial bucket.
+    """
+    now = int(now or time.time())
+    hour_end = now - now % HOUR + HOUR
+    day_end = now - now % DAY + DAY
+    return {
+        'followers': total_followers(username, now),
+        'followers_last_month': total_followers(username, now - 30 * DAY),
+        'day': window_totals(username, hour_end - DAY, hour_end),
+        'previous_day': window_totals(username, hour_end - 2 * DAY, hour_end - DAY),
+        'week': window_totals(username, day_end - 7 * DAY, day_end, 'daily'),
+        'previous_week': window_totals(username, day_end - 14 * DAY, day_end - 7 * DAY, 'daily'),
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Refresh analytics rollups for all users.")
+    parser.add_argument('--full', action='store_true', help="rebuild from scratch instead of incrementally")
+    args = parser.parse_args()
+    create_rollup_tables()
+    print(f"Refreshed rollups for {refresh_all_rollups(args.full)} users.")
@@ -0,0 +1,167 @@
+from database import create_users_table, get_connection
+from sessions import create_sessions_table
+
+# ========== MIGRATIONS ==========
+# Each migration moves the database from version N-1 to N, where N is its
+# position in MIGRATIONS. The current version lives in PRAGMA user_version.
+# Append new migrations; never edit or reorder ones that have shipped.
+
+def _baseline(conn):
+    """Tables that existed before versioning; every statement is IF NOT EXISTS."""
+    # The analytics modules pull in NumPy; only import them when there's work to do
+    from analytics import create_analytics_tables
+    from rollups import create_rollup_tables
+
+    create_users_table()
+    create_sessions_table()
+    create_analytics_tables()
+    create_rollup_tables()
+
+def _listing_indexes(conn):
+    """Index sessions by user (for sign-out-everywhere)."""
+    # The users table's listing index belongs to the user store (see
+    # storage.SQLiteUserStore.create_schema), which may live in another file
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)')
+
+def _rate_limit_buckets(conn):
+    """Persisted login rate-limit buckets (see rate_limit.TokenBucketLimiter)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+            scope TEXT NOT NULL,
+            key TEXT NOT NULL,
+            tokens REAL NOT NULL,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (scope, key)
+        ) WITHOUT ROWID
+    ''')
+
+def _timeseries_tables(conn):
+    """Chunked follower series for the trend chart (see timeseries.py)."""
+    from timeseries import create_timeseries_tables
+
+    create_timeseries_tables()
+
+def _export_jobs(conn):
+    """Queue of background export jobs (see exports.py)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS export_jobs (
+            id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            format TEXT NOT NULL,
+            params TEXT NOT NULL DEFAULT '{}',
+            status TEXT NOT NULL DEFAULT 'queued',
+            path TEXT,
+            rows INTEGER,
+            error TEXT,
+            created_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL
+        )
+    ''')
+    # Workers claim the oldest queued job; the dashboard lists a user's latest
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_export_jobs_status ON export_jobs (status, id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_export_jobs_username ON export_jobs (username, id)')
+
+def _change_tracking(conn):
+    """Triggers recording each user's oldest unrolled raw row (see analytics.create_change_tracking)."""
+    from analytics import create_change_tracking
+
+    create_change_tracking(conn)
+
+# (description, function, transactional). Non-transactional steps run helpers
+# that commit on their own, so they rely on being idempotent instead.
+MIGRATIONS = [
+    ("create users, sessions, analytics and rollup tables", _baseline, False),
+    ("index sessions by username", _listing_indexes, True),
+    ("add rate_limit_buckets table", _rate_limit_buckets, True),
+    ("add series_chunks and series_watermarks tables", _timeseries_tables, False),
+    ("add export_jobs table", _export_jobs, True),
+    ("track raw analytics changes for rollups and follower series", _change_tracking, True),
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version():
+    """Schema version recorded in the database file (0 for a new database)."""
+    return get_connection().execute('PRAGMA user_version').fetchone()[0]
+
+def migrate(target=SCHEMA_VERSION, verbose=False):
+    """Apply pending migrations in order, each in its own transaction.
+
+    Each step takes the write lock (BEGIN IMMEDIATE) and re-reads the version
+    first, so several app processes starting at once apply every
+    transactional migration exactly once. Non-transactional steps may run in
+    more than one process, which their idempotence allows, but the version
+    only ever moves from N to N+1. Returns the resulting schema version.
+    """
+    conn = get_connection()
+    while True:
+        version = get_schema_version()
+        if version >= target:
+            return version
+        description, apply, transactional = MIGRATIONS[version]
+        if verbose:
+            print(f"Applying migration {version + 1}: {description}")
+        if not transactional:
+            apply(conn)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute('PRAGMA user_version').fetchone()[0] == version:
+                if transactional:
+                    apply(conn)
+                conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+def ensure_schema():
+    """Bring the schema up to date, skipping the migrations when it already is.
+
+    Returns the schema version. The check is a single PRAGMA read, so calling
+    this on startup costs almost nothing once the database is set up. The
+    user store's tables are created on every call, because the store may live
+    outside this database (see database.USER_STORE) and a migrated database
+    says nothing about it.
+    """
+    create_users_table()
+    if get_schema_version() >= SCHEMA_VERSION:
+        return SCHEMA_VERSION
+    version = migrate()
+    optimize()
+    return version
+
+# ========== MAINTENANCE ==========
+def analyze():
+    """Refresh the query planner's table and index statistics."""
+    get_connection().execute('ANALYZE')
+
+def optimize():
+    """Let SQLite re-analyze whatever tables it thinks have drifted (cheap; safe to run often)."""
+    get_connection().execute('PRAGMA optimize')
+
+def vacuum():
+    """Rebuild the database file to reclaim free pages and defragment tables and indexes."""
+    get_connection().execute('VACUUM')
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the users.db schema.")
+    parser.add_argument('command', nargs='?', default='migrate',
+                        choices=['migrate', 'status', 'analyze', 'optimize', 'vacuum'])
+    args = parser.parse_args()
+
+    if args.command == 'migrate':
+        version = migrate(verbose=True)
+        optimize()
+        print(f"Schema is at version {version}.")
+    elif args.command == 'status':
+        version = get_schema_version()
+        print(f"Schema version {version} of {SCHEMA_VERSION}.")
+        for number, (description, _, _) in enumerate(MIGRATIONS, start=1):
+            print(f"  [{'x' if number <= version else ' '}] {number}: {description}")
+    else:
+        {'analyze': analyze, 'optimize': optimize, 'vacuum': vacuum}[args.command]()
+        print(f"{args.command.upper()} complete.")
@@ -0,0 +1,97 @@
+import hashlib
+import secrets
+import threading
+import time
+from database import get_connection
+from metrics import timed
+
+# Sessions last a week unless a different TTL is given
+SESSION_TTL = 7 * 24 * 3600
+# Expired sessions are purged at most this often, in batches of this size
+CLEANUP_INTERVAL = 300
+CLEANUP_BATCH_SIZE = 500
+
+_last_cleanup = 0.0
+_cleanup_lock = threading.Lock()
+
+def create_sessions_table():
+    """Create the sessions table and its expiry index if they don't exist."""
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sessions (
+                token_hash TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                created_at INTEGER NOT NULL,
+                expires_at INTEGER NOT NULL
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)')
+
+def _hash_token(token):
+    """Sessions are stored by token hash so a leaked database can't be replayed."""
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+@timed('db_call_seconds')
+def create_session(username, ttl=SESSION_TTL):
+    """Start a session for a user and return its token."""
+    token = secrets.token_urlsafe(32)
+    now = int(time.time())
+    conn = get_connection()
+    with conn:
+        conn.execute('''
+            INSERT INTO sessions (token_hash, username, created_at, expires_at)
+            VALUES (?, ?, ?, ?)
+        ''', (_hash_token(token), username, now, now + ttl))
+    maybe_purge_expired_sessions()
+    return token
+
+@timed('db_call_seconds')
+def get_session_user(token):
+    """Return the username for a live session token, or None."""
+    if not token:
+        return None
+    conn = get_connection()
+    row = conn.execute('SELECT username FROM sessions WHERE token_hash = ? AND expires_at > ?',
+                       (_hash_token(token), int(time.time()))).fetchone()
+    return row[0] if row else None
+
+def delete_session(token):
+    """End a session (e.g. on sign out)."""
+    if not token:
+        return
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM sessions WHERE token_hash = ?', (_hash_token(token),))
+
+def delete_user_sessions(username):
+    """End every session belonging to a user (e.g. after a password change)."""
+    conn = get_connection()
+    with conn:
+        conn.execute('DELETE FROM sessions WHERE username = ?', (username,))
+
+def purge_expired_sessions(batch_size=CLEANUP_BATCH_SIZE):
+    """Delete expired sessions in short batches so writers aren't blocked for long."""
+    conn = get_connection()
+    now = int(time.time())
+    deleted = 0
+    while True:
+        with conn:
+            cursor = conn.execute('''
+                DELETE FROM sessions WHERE token_hash IN (
+                    SELECT token_hash FROM sessions WHERE expires_at <= ? LIMIT ?
+                )
+            ''', (now, batch_size))
+        deleted += cursor.rowcount
+        if cursor.rowcount < batch_size:
+            return deleted
+
+def maybe_purge_expired_sessions(interval=CLEANUP_INTERVAL):
+    """Run purge_expired_sessions if it hasn't run in the last `interval` seconds."""
+    global _last_cleanup
+    now = time.monotonic()
+    with _cleanup_lock:
+        if now - _last_cleanup < interval:
+            return 0
+        _last_cleanup = now
+    return purge_expired_sessions()
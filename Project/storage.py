@@ -0,0 +1,343 @@
+import hashlib
+import heapq
+import os
+import sqlite3
+import threading
+import time
+
+# Pragmas applied to every new connection
+PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 5000),
+    ('mmap_size', 268435456),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -16000),
+)
+
+# Stay under SQLite's bound-parameter limit on older builds
+MAX_QUERY_PARAMS = 900
+
+def open_connection(path):
+    """Open a new tuned connection to a SQLite database file."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    for name, value in PRAGMAS:
+        conn.execute(f'PRAGMA {name} = {value}')
+    return conn
+
+class ConnectionPool:
+    """Hands out one connection per thread for a database file, reusing them across threads.
+
+    A thread keeps its connection for as long as it lives. When it exits
+    (e.g. a Streamlit ScriptRunner at the end of a rerun), the connection goes
+    back to an idle list for the next new thread instead of being reopened.
+    """
+
+    def __init__(self, path, max_idle=8):
+        self.path = path
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._idle = []
+        # Bumped by close_all() so threads drop the handles it closed
+        self._generation = 0
+
+    def get(self):
+        """Return the calling thread's connection, checking one out on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.generation != self._generation:
+            conn, self._local.generation = self._checkout()
+            self._local.conn = conn
+        return conn
+
+    def _checkout(self):
+        with self._lock:
+            self._reap()
+            conn = self._idle.pop() if self._idle else None
+            generation = self._generation
+        if conn is None:
+            conn = open_connection(self.path)
+        with self._lock:
+            if generation != self._generation:
+                # close_all() ran meanwhile; this handle was opened for the old generation
+                conn.close()
+                return self._checkout()
+            self._connections[threading.current_thread()] = conn
+        return conn, generation
+
+    def _reap(self):
+        """Return connections owned by threads that have exited to the idle list."""
+        for thread in [t for t in self._connections if not t.is_alive()]:
+            conn = self._connections.pop(thread)
+            if conn.in_transaction:
+                conn.rollback()
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+            else:
+                conn.close()
+
+    def size(self):
+        """Number of open connections held by the pool (in use or idle)."""
+        with self._lock:
+            return len(self._connections) + len(self._idle)
+
+    def close_all(self):
+        """Close every connection held by the pool; threads open fresh ones on their next get()."""
+        with self._lock:
+            self._generation += 1
+            for conn in [*self._connections.values(), *self._idle]:
+                conn.close()
+            self._connections.clear()
+            self._idle.clear()
+
+# ========== USER STORES ==========
+class UserStore:
+    """Where user accounts live. Passwords arrive already hashed.
+
+    User rows are (id, username, email, created_at) tuples ordered by id.
+    """
+
+    def create_schema(self):
+        """Create whatever tables and indexes the store needs."""
+        raise NotImplementedError
+
+    def add_user(self, username, password_hash, email):
+        """Insert one user. Returns False if the username is taken."""
+        raise NotImplementedError
+
+    def add_users(self, rows):
+        """Insert (username, password_hash, email) rows, skipping taken usernames.
+
+        Returns how many were inserted.
+        """
+        raise NotImplementedError
+
+    def existing_usernames(self, usernames):
+        """Return the subset of `usernames` that are already registered."""
+        raise NotImplementedError
+
+    def get_password_hash(self, username):
+        """Stored password hash for a user, or None."""
+        raise NotImplementedError
+
+    def set_password_hash(self, username, password_hash):
+        """Replace a user's password hash. Returns False if the user doesn't exist."""
+        raise NotImplementedError
+
+    def get_users_page(self, after_id=0, limit=100):
+        """Up to `limit` users with id greater than `after_id`."""
+        raise NotImplementedError
+
+    def get_all_users(self):
+        """Every user, in id order."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release connections or other resources."""
+
+class SQLiteUserStore(UserStore):
+    """Users in a SQLite file, through a per-thread connection pool."""
+
+    def __init__(self, path=None, pool=None):
+        self.pool = pool or ConnectionPool(path)
+
+    def create_schema(self):
+        conn = self.pool.get()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    username TEXT UNIQUE NOT NULL,
+                    password TEXT NOT NULL,
+                    email TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_users_created_at ON users (created_at, id)')
+
+    def add_user(self, username, password_hash, email):
+        conn = self.pool.get()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT INTO users (username, password, email)
+                    VALUES (?, ?, ?)
+                ''', (username, password_hash, email))
+            return True
+        except sqlite3.IntegrityError:
+            return False  # Username already exists
+
+    def add_users(self, rows):
+        conn = self.pool.get()
+        with conn:
+            before = conn.total_changes
+            conn.executemany('''
+                INSERT OR IGNORE INTO users (username, password, email)
+                VALUES (?, ?, ?)
+            ''', rows)
+            return conn.total_changes - before
+
+    def existing_usernames(self, usernames):
+        conn = self.pool.get()
+        usernames = list(usernames)
+        existing = set()
+        for start in range(0, len(usernames), MAX_QUERY_PARAMS):
+            chunk = usernames[start:start + MAX_QUERY_PARAMS]
+            placeholders = ','.join('?' * len(chunk))
+            cursor = conn.execute(f'SELECT username FROM users WHERE username IN ({placeholders})', chunk)
+            existing.update(row[0] for row in cursor)
+        return existing
+
+    def get_password_hash(self, username):
+        row = self.pool.get().execute('SELECT password FROM users WHERE username = ?', (username,)).fetchone()
+        return row[0] if row else None
+
+    def set_password_hash(self, username, password_hash):
+        conn = self.pool.get()
+        with conn:
+            cursor = conn.execute('UPDATE users SET password = ? WHERE username = ?',
+                                  (password_hash, username))
+        return cursor.rowcount > 0
+
+    def get_users_page(self, after_id=0, limit=100):
+        return self.pool.get().execute('''
+            SELECT id, username, email, created_at FROM users
+            WHERE id > ?
+            ORDER BY id
+            LIMIT ?
+        ''', (after_id, limit)).fetchall()
+
+    def get_all_users(self):
+        return self.pool.get().execute('SELECT id, username, email, created_at FROM users ORDER BY id').fetchall()
+
+    def close(self):
+        self.pool.close_all()
+
+class MemoryUserStore(UserStore):
+    """Users in a dict; for tests and benchmarks that shouldn't touch disk."""
+
+    def __init__(self):
+        self._users = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def create_schema(self):
+        pass
+
+    def _insert(self, username, password_hash, email):
+        if username in self._users:
+            return False
+        created_at = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+        self._users[username] = [self._next_id, username, email, created_at, password_hash]
+        self._next_id += 1
+        return True
+
+    def add_user(self, username, password_hash, email):
+        with self._lock:
+            return self._insert(username, password_hash, email)
+
+    def add_users(self, rows):
+        with self._lock:
+            return sum(self._insert(*row) for row in rows)
+
+    def existing_usernames(self, usernames):
+        with self._lock:
+            return {username for username in usernames if username in self._users}
+
+    def get_password_hash(self, username):
+        user = self._users.get(username)
+        return user[4] if user else None
+
+    def set_password_hash(self, username, password_hash):
+        with self._lock:
+            user = self._users.get(username)
+            if user is None:
+                return False
+            user[4] = password_hash
+            return True
+
+    def get_users_page(self, after_id=0, limit=100):
+        # Dicts keep insertion order, which is id order
+        with self._lock:
+            users = list(self._users.values())
+        return [tuple(user[:4]) for user in users if user[0] > after_id][:limit]
+
+    def get_all_users(self):
+        with self._lock:
+            return [tuple(user[:4]) for user in self._users.values()]
+
+class ShardedSQLiteUserStore(UserStore):
+    """Users spread over several SQLite files by a stable hash of the username.
+
+    Each shard has its own connection pool, so writers to different shards
+    never contend for the same file lock. Listings expose a global id of
+    local_id * shard_count + shard_index and page through all shards with
+    a k-way merge.
+    """
+
+    def __init__(self, paths):
+        self.shards = [SQLiteUserStore(path) for path in paths]
+
+    def shard_index(self, username):
+        digest = hashlib.blake2b(username.encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big') % len(self.shards)
+
+    def _shard(self, username):
+        return self.shards[self.shard_index(username)]
+
+    def _group(self, items, key):
+        groups = {}
+        for item in items:
+            groups.setdefault(self.shard_index(key(item)), []).append(item)
+        return groups
+
+    def _global_rows(self, index, rows):
+        count = len(self.shards)
+        return [(row[0] * count + index,) + tuple(row[1:]) for row in rows]
+
+    def create_schema(self):
+        for shard in self.shards:
+            shard.create_schema()
+
+    def add_user(self, username, password_hash, email):
+        return self._shard(username).add_user(username, password_hash, email)
+
+    def add_users(self, rows):
+        groups = self._group(rows, key=lambda row: row[0])
+        return sum(self.shards[index].add_users(group) for index, group in groups.items())
+
+    def existing_usernames(self, usernames):
+        groups = self._group(usernames, key=lambda username: username)
+        existing = set()
+        for index, group in groups.items():
+            existing |= self.shards[index].existing_usernames(group)
+        return existing
+
+    def get_password_hash(self, username):
+        return self._shard(username).get_password_hash(username)
+
+    def set_password_hash(self, username, password_hash):
+        return self._shard(username).set_password_hash(username, password_hash)
+
+    def get_users_page(self, after_id=0, limit=100):
+        count = len(self.shards)
+        pages = []
+        for index, shard in enumerate(self.shards):
+            # Smallest local id whose global id is above after_id
+            local_after = (after_id - index) // count
+            pages.append(self._global_rows(index, shard.get_users_page(local_after, limit)))
+        return list(heapq.merge(*pages))[:limit]
+
+    def get_all_users(self):
+        return list(heapq.merge(*(self._global_rows(index, shard.get_all_users())
+                                  for index, shard in enumerate(self.shards))))
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+def shard_paths(path, shards):
+    """users.db -> users.shard0.db, users.shard1.db, ..."""
+    root, ext = os.path.splitext(path)
+    return [f'{root}.shard{index}{ext or ".db"}' for index in range(shards)]
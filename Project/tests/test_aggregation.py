@@ -0,0 +1,61 @@
+"""Partitioned aggregation must give the same totals however the work is split."""
+import numpy as np
+import pytest
+
+import database
+from aggregation import AggregationEngine, merge_partials, plan_partitions
+from analytics import DAY, PLATFORMS, seed_demo_data
+from schema import ensure_schema
+
+NOW = 1_700_000_000
+START, END = NOW - 30 * DAY, NOW
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    ensure_schema()
+    for username in ('alice', 'bob'):
+        seed_demo_data(username, days=30, now=NOW)
+    yield database.get_connection()
+    database.close_connections()
+
+def test_plan_splits_many_users_into_groups():
+    usernames = [f'user{n}' for n in range(10)]
+    partitions = plan_partitions(usernames, START, END, parts=3)
+    assert len(partitions) == 3
+    assert [name for group, *_ in partitions for name in group] == usernames
+    assert all(partition[1:] == (tuple(PLATFORMS), START, END) for partition in partitions)
+
+def test_plan_splits_few_users_by_platform_and_time():
+    partitions = plan_partitions(['alice'], START, END, parts=12)
+    assert len(partitions) >= 12
+    for platform in PLATFORMS:
+        ranges = sorted((lo, hi) for _, platforms, lo, hi in partitions if platforms == (platform,))
+        assert ranges[0][0] == START and ranges[-1][1] == END
+        assert all(hi == next_lo for (_, hi), (next_lo, _) in zip(ranges, ranges[1:]))
+
+def test_merge_partials_adds_without_mutating():
+    first = {'Instagram': np.array([1.0, 2.0])}
+    second = {'Instagram': np.array([3.0, 4.0]), 'Twitter': np.array([5.0, 6.0])}
+    merged = merge_partials([first, second])
+    assert merged['Instagram'].tolist() == [4.0, 6.0]
+    assert merged['Twitter'].tolist() == [5.0, 6.0]
+    assert first['Instagram'].tolist() == [1.0, 2.0]
+
+def assert_same(result, expected):
+    assert result['platform'].tolist() == expected['platform'].tolist()
+    for name, values in expected.items():
+        if name != 'platform':
+            np.testing.assert_allclose(result[name], values, err_msg=name)
+
+def test_split_and_parallel_match_inline(db):
+    inline = AggregationEngine().aggregate(['alice', 'bob'], START, END)
+    total = db.execute('SELECT SUM(engagements) FROM platform_engagement WHERE ts >= ? AND ts < ?',
+                       (START, END)).fetchone()[0]
+    assert inline['engagements'].sum() == total
+    assert_same(AggregationEngine().aggregate(['alice', 'bob'], START, END, parts=13), inline)
+    engine = AggregationEngine(workers=2)
+    try:
+        assert_same(engine.aggregate(['alice', 'bob'], START, END), inline)
+    finally:
+        engine.shutdown()
@@ -0,0 +1,40 @@
+"""Parquet exports must keep one schema across chunks, NULL-only ones included."""
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+import database
+from exports import DATASETS, write_dataset
+from schema import ensure_schema
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    ensure_schema()
+    conn = database.get_connection()
+    with conn:
+        # Response times are only recorded on some platforms
+        for n in range(12):
+            platform, response = ('Facebook', 3.5) if n < 6 else ('Twitter', None)
+            conn.execute('''
+                INSERT INTO platform_engagement
+                    (username, platform, ts, impressions, engagements, engaged_users, response_minutes)
+                VALUES ('alice', ?, ?, 10, 2, 1, ?)
+            ''', (platform, 1_700_000_000 + n, response))
+    yield conn
+    database.close_connections()
+
+def test_chunk_with_only_nulls(db, tmp_path):
+    path = str(tmp_path / 'engagement.parquet')
+    assert write_dataset('engagement', 'parquet', 'alice', 0, 2_000_000_000, path, chunk_rows=5) == 12
+    table = pq.read_table(path)
+    assert table.schema.field('response_minutes').type == pa.float64()
+    assert table.column('response_minutes').null_count == 6
+
+@pytest.mark.parametrize('kind', list(DATASETS))
+def test_empty_export_keeps_column_types(db, tmp_path, kind):
+    path = str(tmp_path / f'{kind}.parquet')
+    assert write_dataset(kind, 'parquet', 'nobody', 0, 2_000_000_000, path) == 0
+    schema = pq.read_schema(path)
+    assert schema.names == list(DATASETS[kind][1])
+    assert pa.null() not in schema.types
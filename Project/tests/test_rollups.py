@@ -0,0 +1,72 @@
+"""Incremental rollup and follower-series refreshes must match a full rebuild."""
+import random
+
+import pytest
+
+import database
+from analytics import DAY, ENGAGEMENT_LEVELS, PLATFORMS, seed_demo_data
+from rollups import GRANULARITIES, get_watermark, refresh_rollups
+from schema import ensure_schema
+from timeseries import sync_follower_series
+
+USERNAME = 'alice'
+NOW = 1_700_000_000
+
+@pytest.fixture
+def db(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    ensure_schema()
+    yield database.get_connection()
+    database.close_connections()
+
+def snapshot(conn):
+    """Every rollup and series row for the test user."""
+    tables = {granularity: conn.execute(f'SELECT * FROM rollup_{granularity} WHERE username = ? '
+                                        'ORDER BY bucket, platform', (USERNAME,)).fetchall()
+              for granularity in GRANULARITIES}
+    tables['series'] = conn.execute("SELECT * FROM series_chunks WHERE series LIKE ? ORDER BY series, chunk_start",
+                                    (f'%/{USERNAME}',)).fetchall()
+    return tables
+
+def refresh(full=False):
+    refresh_rollups(USERNAME, full=full)
+    sync_follower_series(USERNAME, full=full)
+
+def write_late_rows(conn, rng):
+    """Rows dated well before everything already rolled up, plus an update and a delete."""
+    with conn:
+        for _ in range(50):
+            ts = NOW - rng.randint(2 * DAY, 300 * DAY)
+            platform = rng.choice(PLATFORMS)
+            conn.execute('INSERT OR REPLACE INTO platform_engagement VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (USERNAME, platform, ts, 1000, 50000, 100, 20.0))
+            conn.execute('INSERT OR REPLACE INTO follower_snapshots VALUES (?, ?, ?, ?)',
+                         (USERNAME, platform, ts + 1, rng.randint(1, 10 ** 6)))
+            conn.execute('INSERT INTO activity_events (username, platform, ts, activity, engagement_level, '
+                         'engagements) VALUES (?, ?, ?, ?, ?, ?)',
+                         (USERNAME, platform, ts, 'Backfilled', rng.choice(ENGAGEMENT_LEVELS), 7))
+        conn.execute('UPDATE platform_engagement SET ts = ts - 90 * 86400 + 7 WHERE username = ? AND platform = ? '
+                     'AND ts = (SELECT MAX(ts) FROM platform_engagement WHERE username = ? AND platform = ?)',
+                     (USERNAME, PLATFORMS[0], USERNAME, PLATFORMS[0]))
+        conn.execute('DELETE FROM follower_snapshots WHERE username = ? AND platform = ? AND ts < ?',
+                     (USERNAME, PLATFORMS[1], NOW - 200 * DAY))
+
+def test_incremental_refresh_matches_full_rebuild(db):
+    seed_demo_data(USERNAME, days=365, now=NOW)
+    refresh()
+    version = get_watermark(USERNAME)
+
+    write_late_rows(db, random.Random(0))
+    refresh()
+    incremental = snapshot(db)
+    assert get_watermark(USERNAME) > version
+
+    refresh(full=True)
+    assert snapshot(db) == incremental
+
+def test_refresh_is_a_no_op_without_new_rows(db):
+    seed_demo_data(USERNAME, days=30, now=NOW)
+    assert refresh_rollups(USERNAME)
+    assert sync_follower_series(USERNAME)
+    assert not refresh_rollups(USERNAME)
+    assert not sync_follower_series(USERNAME)
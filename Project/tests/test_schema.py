@@ -0,0 +1,62 @@
+"""Migrations must bring new and old databases to the same schema, exactly once."""
+import pytest
+
+import database
+import schema
+from analytics import seed_demo_data
+from rollups import refresh_rollups
+
+NOW = 1_700_000_000
+
+@pytest.fixture
+def conn(tmp_path):
+    database.configure_database(str(tmp_path / 'test.db'))
+    yield database.get_connection()
+    database.close_connections()
+
+def names(conn, kind):
+    return {row[0] for row in conn.execute('SELECT name FROM sqlite_master WHERE type = ?', (kind,))}
+
+def test_fresh_database(conn):
+    assert schema.get_schema_version() == 0
+    assert schema.ensure_schema() == schema.SCHEMA_VERSION
+    assert schema.get_schema_version() == schema.SCHEMA_VERSION
+    assert {'users', 'sessions', 'rate_limit_buckets', 'series_chunks',
+            'export_jobs', 'analytics_changes'} <= names(conn, 'table')
+    assert {'idx_users_created_at', 'idx_sessions_username'} <= names(conn, 'index')
+    assert 'follower_snapshots_changed_insert' in names(conn, 'trigger')
+
+def test_upgrade_from_baseline(conn):
+    assert schema.migrate(target=1) == 1
+    seed_demo_data('alice', days=10, now=NOW)
+    # Today's baseline already tracks changes; a database from before migration 6 didn't
+    with conn:
+        for trigger in names(conn, 'trigger'):
+            conn.execute(f'DROP TRIGGER {trigger}')
+        conn.execute('DROP TABLE analytics_changes')
+
+    assert schema.ensure_schema() == schema.SCHEMA_VERSION
+    assert conn.execute('SELECT rollups_from, series_from FROM analytics_changes '
+                        "WHERE username = 'alice'").fetchone() == (0, 0)
+    refresh_rollups('alice')
+    assert conn.execute("SELECT COUNT(*) FROM rollup_daily WHERE username = 'alice'").fetchone()[0] > 0
+
+def test_ensure_schema_is_a_noop_when_current(conn):
+    schema.ensure_schema()
+    objects = names(conn, 'table') | names(conn, 'index') | names(conn, 'trigger')
+    assert schema.ensure_schema() == schema.SCHEMA_VERSION
+    assert names(conn, 'table') | names(conn, 'index') | names(conn, 'trigger') == objects
+
+def test_migrate_rechecks_version_under_lock(conn, monkeypatch):
+    schema.migrate()
+    applied = []
+    monkeypatch.setattr(schema, 'MIGRATIONS', [(description, lambda conn, n=n: applied.append(n), transactional)
+                                               for n, (description, _, transactional)
+                                               in enumerate(schema.MIGRATIONS, 1)])
+    # Another process migrated between our version read and our BEGIN IMMEDIATE
+    reads = iter([schema.SCHEMA_VERSION - 2])
+    real = schema.get_schema_version
+    monkeypatch.setattr(schema, 'get_schema_version', lambda: next(reads, None) or real())
+    assert schema.migrate() == schema.SCHEMA_VERSION
+    assert applied == []
+    assert real() == schema.SCHEMA_VERSION
@@ -0,0 +1,47 @@
+"""The sharded user store must list users like a single table would."""
+import pytest
+
+from storage import ShardedSQLiteUserStore, shard_paths
+
+@pytest.fixture
+def store(tmp_path):
+    store = ShardedSQLiteUserStore(shard_paths(str(tmp_path / 'users.db'), 3))
+    store.create_schema()
+    store.add_users([(f'user{n}', f'hash{n}', f'user{n}@example.com') for n in range(50)])
+    yield store
+    store.close()
+
+def test_shard_paths():
+    assert shard_paths('/data/users.db', 2) == ['/data/users.shard0.db', '/data/users.shard1.db']
+
+def test_global_ids_map_back_to_shards(store):
+    users = store.get_all_users()
+    ids = [user[0] for user in users]
+    assert len(users) == 50
+    assert ids == sorted(set(ids))
+    for user_id, username, *_ in users:
+        assert user_id % len(store.shards) == store.shard_index(username)
+
+def test_paging_matches_full_listing(store):
+    pages, after_id = [], 0
+    while True:
+        page = store.get_users_page(after_id, limit=7)
+        if not page:
+            break
+        assert len(page) <= 7
+        pages.extend(page)
+        after_id = page[-1][0]
+    assert pages == store.get_all_users()
+
+@pytest.mark.parametrize('after_id', [0, 1, 2, 3, 10, 11, 37, 1000])
+def test_page_starts_after_any_id(store, after_id):
+    expected = [user for user in store.get_all_users() if user[0] > after_id][:5]
+    assert store.get_users_page(after_id, limit=5) == expected
+
+def test_lookups_route_to_the_owning_shard(store):
+    assert store.get_password_hash('user7') == 'hash7'
+    assert store.set_password_hash('user7', 'new')
+    assert store.get_password_hash('user7') == 'new'
+    assert not store.set_password_hash('nobody', 'new')
+    assert store.existing_usernames(['user1', 'user49', 'nobody']) == {'user1', 'user49'}
+    assert not store.add_user('user1', 'hash', None)
@@ -0,0 +1,230 @@
+import numpy as np
+from analytics import DAY, PLATFORMS, _columnar, _pending_since
+from database import get_connection
+from metrics import timed
+
+# Each stored chunk covers one week; point times are kept as uint32 offsets from its start
+CHUNK_SECONDS = 7 * DAY
+
+# Most points a chart is given, whatever the time range (about one per pixel column)
+MAX_CHART_POINTS = 1500
+
+def create_timeseries_tables():
+    """Create the chunked series storage if it doesn't exist."""
+    conn = get_connection()
+    with conn:
+        # Each row is one chunk of one series: little-endian uint32 time
+        # offsets and float64 values, packed as BLOBs
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS series_chunks (
+                series TEXT NOT NULL,
+                chunk_start INTEGER NOT NULL,
+                points INTEGER NOT NULL,
+                ts BLOB NOT NULL,
+                vals BLOB NOT NULL,
+                PRIMARY KEY (series, chunk_start)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS series_watermarks (
+                username TEXT PRIMARY KEY,
+                watermark INTEGER NOT NULL
+            )
+        ''')
+
+def series_key(metric, username, platform):
+    return f"{metric}/{platform}/{username}"
+
+# ========== CHUNK STORAGE ==========
+def _decode(chunk_start, ts_blob, vals_blob):
+    ts = np.frombuffer(ts_blob, dtype='<u4').astype(np.int64) + chunk_start
+    return ts, np.frombuffer(vals_blob, dtype='<f8')
+
+def _encode(chunk_start, ts, values):
+    return ((ts - chunk_start).astype('<u4').tobytes(), np.asarray(values, dtype='<f8').tobytes())
+
+def _append(conn, series, ts, values):
+    """Merge points into their chunks; a new value replaces an old one at the same ts."""
+    order = np.argsort(ts, kind='stable')
+    ts, values = ts[order], values[order]
+    chunk_starts = ts - ts % CHUNK_SECONDS
+    splits = np.flatnonzero(chunk_starts[1:] != chunk_starts[:-1]) + 1
+    for chunk_ts, chunk_values in zip(np.split(ts, splits), np.split(values, splits)):
+        chunk_start = int(chunk_ts[0] - chunk_ts[0] % CHUNK_SECONDS)
+        row = conn.execute('SELECT ts, vals FROM series_chunks WHERE series = ? AND chunk_start = ?',
+                           (series, chunk_start)).fetchone()
+        if row is not None:
+            old_ts, old_values = _decode(chunk_start, *row)
+            chunk_ts = np.concatenate([old_ts, chunk_ts])
+            chunk_values = np.concatenate([old_values, chunk_values])
+            order = np.argsort(chunk_ts, kind='stable')
+            chunk_ts, chunk_values = chunk_ts[order], chunk_values[order]
+            # Stable sort keeps new points after old ones, so keep the last of each ts
+            last = np.r_[chunk_ts[1:] != chunk_ts[:-1], True]
+            chunk_ts, chunk_values = chunk_ts[last], chunk_values[last]
+        conn.execute('INSERT OR REPLACE INTO series_chunks (series, chunk_start, points, ts, vals) '
+                     'VALUES (?, ?, ?, ?, ?)',
+                     (series, chunk_start, len(chunk_ts), *_encode(chunk_start, chunk_ts, chunk_values)))
+
+def append_points(series, ts, values):
+    """Store points in a series, merging them into existing chunks."""
+    ts = np.asarray(ts, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    if len(ts) == 0:
+        return
+    conn = get_connection()
+    with conn:
+        _append(conn, series, ts, values)
+
+def read_series(series, start, end, carry=False):
+    """Points with start <= ts < end as (ts, values) arrays in time order.
+
+    With carry=True the last point before `start` is included too, so a
+    step series has a known value at the start of the range.
+    """
+    conn = get_connection()
+    rows = conn.execute('''
+        SELECT chunk_start, ts, vals FROM series_chunks
+        WHERE series = ? AND chunk_start > ? AND chunk_start < ?
+        ORDER BY chunk_start
+    ''', (series, start - CHUNK_SECONDS, end)).fetchall()
+    if carry:
+        previous = conn.execute('''
+            SELECT chunk_start, ts, vals FROM series_chunks
+            WHERE series = ? AND chunk_start <= ?
+            ORDER BY chunk_start DESC LIMIT 1
+        ''', (series, start - CHUNK_SECONDS)).fetchone()
+        if previous is not None:
+            rows.insert(0, previous)
+    if not rows:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    chunks = [_decode(*row) for row in rows]
+    ts = np.concatenate([chunk_ts for chunk_ts, _ in chunks])
+    values = np.concatenate([chunk_values for _, chunk_values in chunks])
+    lo, hi = np.searchsorted(ts, [start, end])
+    if carry and lo > 0:
+        lo -= 1
+    return ts[lo:hi], values[lo:hi]
+
+# ========== FOLLOWER SERIES ==========
+@timed('db_call_seconds')
+def sync_follower_series(username, full=False):
+    """Rewrite the per-platform follower series from the oldest snapshot changed since the last sync.
+
+    Like the rollups, this follows analytics_changes, so late or backfilled
+    snapshots are picked up; only the chunks from that point on are
+    rewritten. Returns True if anything was synced.
+    """
+    conn = get_connection()
+    if not full and _pending_since(conn, username, 'series_from') is None:
+        return False
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute('SELECT version, series_from FROM analytics_changes WHERE username = ?',
+                           (username,)).fetchone()
+        if row is None or (row[1] is None and not full):
+            conn.execute('COMMIT')
+            return False
+        start = 0 if full else row[1] - row[1] % CHUNK_SECONDS
+        conn.executemany('DELETE FROM series_chunks WHERE series = ? AND chunk_start >= ?',
+                         [(series_key('followers', username, platform), start) for platform in PLATFORMS])
+        cursor = conn.execute('''
+            SELECT platform, ts, followers FROM follower_snapshots
+            WHERE username = ? AND ts >= ?
+            ORDER BY platform, ts
+        ''', (username, start))
+        data = _columnar(cursor, [('platform', object), ('ts', np.int64), ('followers', np.float64)])
+        for platform in np.unique(data['platform']):
+            mask = data['platform'] == platform
+            _append(conn, series_key('followers', username, platform), data['ts'][mask], data['followers'][mask])
+        conn.execute('UPDATE analytics_changes SET series_from = NULL WHERE username = ?', (username,))
+        conn.execute('INSERT OR REPLACE INTO series_watermarks (username, watermark) VALUES (?, ?)',
+                     (username, row[0]))
+        conn.execute('COMMIT')
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    return True
+
+def follower_history(username, start, end, step=None):
+    """Total followers across platforms at every snapshot time in [start, end).
+
+    Each platform's count holds until its next snapshot; a platform counts
+    as 0 before its first one. With `step`, each platform is first cut to its
+    last value per `step` seconds, which bounds the work for long ranges.
+    """
+    series = []
+    for platform in PLATFORMS:
+        ts, values = read_series(series_key('followers', username, platform), start, end, carry=True)
+        if len(ts):
+            # The carried-in point stands for the value at `start`
+            ts = np.maximum(ts, start)
+            if step:
+                ts, values = resample(ts, values, step, 'last')
+            series.append((ts, values))
+    if not series:
+        return {'ts': np.array([], dtype=np.int64), 'followers': np.array([], dtype=np.float64)}
+    grid = np.unique(np.concatenate([ts for ts, _ in series]))
+    total = np.zeros(len(grid))
+    for ts, values in series:
+        idx = np.searchsorted(ts, grid, side='right') - 1
+        total += np.where(idx >= 0, values[np.maximum(idx, 0)], 0.0)
+    return {'ts': grid, 'followers': total}
+
+# ========== TRANSFORMS ==========
+def resample(ts, values, step, how='last'):
+    """Bucket time-ordered points into `step`-second buckets.
+
+    `how` is 'last', 'first', 'sum', 'mean', 'max' or 'min'. Returns the
+    bucket start times and one value per non-empty bucket.
+    """
+    if len(ts) == 0:
+        return ts, values
+    buckets = ts - ts % step
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    if how == 'last':
+        out = values[np.r_[starts[1:] - 1, len(values) - 1]]
+    elif how == 'first':
+        out = values[starts]
+    elif how == 'sum':
+        out = np.add.reduceat(values, starts)
+    elif how == 'mean':
+        out = np.add.reduceat(values, starts) / np.diff(np.r_[starts, len(values)])
+    elif how == 'max':
+        out = np.maximum.reduceat(values, starts)
+    elif how == 'min':
+        out = np.minimum.reduceat(values, starts)
+    else:
+        raise ValueError(f"Unknown aggregation {how!r}")
+    return buckets[starts], out
+
+def lttb(ts, values, threshold):
+    """Largest-Triangle-Three-Buckets downsampling to `threshold` points.
+
+    Keeps the first and last points and, from each bucket in between, the
+    point forming the largest triangle with the previously kept point and the
+    next bucket's average, which preserves peaks and dips that plain
+    decimation drops.
+    """
+    n = len(ts)
+    if threshold >= n or threshold < 3:
+        return ts, values
+    x = ts.astype(np.float64)
+    y = values.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[hi:next_hi].mean()
+        avg_y = y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return ts[keep], values[keep]
+
+def downsample(ts, values, max_points=MAX_CHART_POINTS):
+    """At most `max_points` points for plotting, chosen by LTTB."""
+    return lttb(ts, values, max_points)
@@ -0,0 +1,33 @@
+import time
+from contextlib import contextmanager
+from metrics import observe
+
+class RenderTimer:
+    """Collects wall-clock durations of named sections during one script run.
+
+    Each section is also recorded in the dashboard_section_seconds histogram.
+    """
+
+    def __init__(self):
+        self.sections = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def section(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.sections[name] = self.sections.get(name, 0.0) + elapsed
+            observe('dashboard_section_seconds', elapsed, section=name)
+
+    def total(self):
+        """Seconds since the timer was created."""
+        return time.perf_counter() - self._start
+
+    def summary(self):
+        """One-line summary in milliseconds, e.g. for a caption."""
+        parts = [f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.sections.items()]
+        parts.append(f"total {self.total() * 1000:.1f} ms")
+        return " • ".join(parts)